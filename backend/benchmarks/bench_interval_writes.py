@@ -0,0 +1,68 @@
+"""Measure how many Interval rows/sec each worker write mode persists.
+
+    python bench_interval_writes.py --rows 3000 --repeat 5
+
+Uses CALENDAR_DATABASE_URL when it is set (point it at PostgreSQL to include
+COPY), otherwise a throwaway SQLite database.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+WORKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "worker")
+sys.path.insert(0, WORKER_DIR)
+
+if not os.getenv("CALENDAR_DATABASE_URL"):
+    os.environ["CALENDAR_DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+import sqlalchemy as sa
+
+import worker
+from models.base import Base
+from models.interval import Interval
+from models.job import Job
+
+MODES = ["orm", "bulk", "copy"]
+
+
+def make_slots(rows, duration=timedelta(minutes=15)):
+    start = datetime(2026, 1, 1)
+    return [(start + i * duration, start + (i + 1) * duration) for i in range(rows)]
+
+def run(mode, slots):
+    job = Job(status="PENDING")
+    worker.session.add(job)
+    worker.session.commit()
+    job_id = job.id
+
+    started = time.perf_counter()
+    worker.save_results(job_id, slots, mode=mode)
+    elapsed = time.perf_counter() - started
+
+    worker.session.execute(sa.delete(Interval.__table__).where(Interval.__table__.c.job_id == job_id))
+    worker.session.execute(sa.delete(Job.__table__).where(Job.__table__.c.id == job_id))
+    worker.session.commit()
+
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2976, help="slots per job (default: 1 month of 15-minute slots)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(worker.engine)
+    slots = make_slots(args.rows)
+
+    print(f"{worker.engine.dialect.name}, {args.rows} rows per job, best of {args.repeat}")
+    for mode in MODES:
+        if mode == "copy" and worker.engine.dialect.name != "postgresql":
+            continue
+        best = min(run(mode, slots) for _ in range(args.repeat))
+        print(f"{mode:>5}: {args.rows / best:12,.0f} rows/sec ({best * 1000:.1f} ms/job)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark the worker's interval engines on synthetic calendars.
+
+    python bench_intervals.py --members 30 --groups-per-member 10 --events-per-group 200 --window-days 30
+    python bench_intervals.py --output results.json
+    python bench_intervals.py --compare results.json
+
+Every engine is differential-tested against the reference engine
+(services/worker/intervals.py) on the same calendar before it is timed.
+Runs offline: no database, broker or Keycloak needed.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+WORKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "worker")
+sys.path.insert(0, WORKER_DIR)
+
+import intervals
+
+ENGINES = {"python": intervals}
+try:
+    import intervals_numpy
+    ENGINES["numpy"] = intervals_numpy
+except ImportError:
+    pass
+
+STEP = timedelta(minutes=15)
+
+
+def make_calendar(members, groups_per_member, events_per_group, window_days, seed=0):
+    """Busy intervals of one group whose members each sit in `groups_per_member` groups"""
+    rng = random.Random(seed)
+    start_time = datetime(2026, 1, 1)
+    end_time = start_time + timedelta(days=window_days)
+    steps = int((end_time - start_time) / STEP)
+
+    # members share groups, so the affecting set is smaller than members * groups_per_member
+    pool = range(max(groups_per_member, members * groups_per_member // 2))
+    groups = set()
+    for _ in range(members):
+        groups.update(rng.sample(pool, groups_per_member))
+
+    busy = []
+    for _ in groups:
+        for _ in range(events_per_group):
+            event_start = start_time + rng.randrange(steps) * STEP
+            event_end = min(event_start + rng.randint(1, 12) * STEP, end_time)
+            busy.append((event_start, event_end))
+
+    return busy, start_time, end_time
+
+def stages(engine, busy, start_time, end_time, duration):
+    merged = intervals.merge_intervals(list(busy))
+    free = intervals.free_intervals(merged, start_time, end_time)
+
+    runs = {
+        "merge": (lambda: engine.merge_intervals(list(busy)), len(busy)),
+        "free": (lambda: engine.free_intervals(merged, start_time, end_time), len(merged)),
+        "slots": (lambda: engine.generate_slots(free, duration), len(free)),
+        "find_slots": (lambda: engine.find_slots(list(busy), start_time, end_time, duration), len(busy)),
+    }
+
+    if hasattr(engine, "epoch_array"):
+        # what the worker runs for this engine: rows arrive as epoch microseconds from the database
+        rows = [(engine.to_epoch(start), engine.to_epoch(end)) for start, end in busy]
+        runs["find_slots_epochs"] = (
+            lambda: engine.find_slots(engine.epoch_array(rows), start_time, end_time, duration), len(busy)
+        )
+
+    return runs
+
+def check(engine, busy, start_time, end_time, duration):
+    """Differential test of one engine against the reference functions"""
+    reference = stages(intervals, busy, start_time, end_time, duration)
+    candidate = stages(engine, busy, start_time, end_time, duration)
+
+    for stage, (run, _) in candidate.items():
+        # stages taking another input form are checked against the reference stage they replace
+        if run() != reference[stage.replace("_epochs", "")][0]():
+            raise AssertionError(f"{engine.__name__}.{stage} differs from the reference engine")
+
+def measure(run, repeat):
+    best = min(_timed(run) for _ in range(repeat))
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+def _timed(run):
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["engine"], r["stage"]): r for r in json.load(f)["results"]}
+
+    print(f"\nvs {baseline_path}")
+    for result in results:
+        before = baseline.get((result["engine"], result["stage"]))
+        if before is None:
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        print(f"{result['engine']:>8} {result['stage']:>17}: {change:+7.1%} time")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=30)
+    parser.add_argument("--groups-per-member", type=int, default=10)
+    parser.add_argument("--events-per-group", type=int, default=60)
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--duration-minutes", type=int, default=15)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    params = {
+        "members": args.members,
+        "groups_per_member": args.groups_per_member,
+        "events_per_group": args.events_per_group,
+        "window_days": args.window_days,
+        "duration_minutes": args.duration_minutes,
+        "seed": args.seed,
+    }
+    busy, start_time, end_time = make_calendar(
+        args.members, args.groups_per_member, args.events_per_group, args.window_days, args.seed
+    )
+    duration = timedelta(minutes=args.duration_minutes)
+
+    print(f"{len(busy)} busy intervals over {args.window_days} days, best of {args.repeat}")
+
+    results = []
+    for name in args.engines:
+        engine = ENGINES[name]
+        check(engine, busy, start_time, end_time, duration)
+
+        for stage, (run, items) in stages(engine, busy, start_time, end_time, duration).items():
+            seconds, peak = measure(run, args.repeat)
+            results.append({
+                "engine": name,
+                "stage": stage,
+                "items": items,
+                "seconds": seconds,
+                "items_per_sec": items / seconds if seconds else None,
+                "peak_bytes": peak,
+            })
+            print(f"{name:>8} {stage:>17}: {seconds * 1000:9.2f} ms  {items / seconds:14,.0f} items/s  {peak / 1024:9.0f} KiB peak")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": _commit(), "params": params, "results": results}, f, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
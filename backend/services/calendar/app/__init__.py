@@ -6,6 +6,10 @@ from .models.event import Event
 from .models.availability import Availability
 from .models.job import Job
 from .models.interval import Interval
+from .models.group_overlap import GroupOverlap
+from .models.user_busy import UserBusy
+from .utils.publisher import Publisher
+from .utils.schema_upgrade import upgrade_tables
 
 import os
 import redis
@@ -19,14 +23,26 @@ def create_app():
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
     app.redis_client = redis.from_url(redis_url, decode_responses=True)
 
+    # connects lazily on the first publish and is shared by every request thread of this process
+    app.publisher = Publisher(app.config["RABBITMQ_URL"], app.config["RABBITMQ_PUBLISHER_POOL"])
+
     with app.app_context():
         _wait_for_db_and_create_tables()
+        if app.config["SCHEMA_UPGRADE"]:
+            upgrade_tables()
+        _backfill_indexes()
+
+        if app.config["EVENT_OVERLAP_MODE"] == "constraint":
+            from .utils.event_overlap import ensure_overlap_constraint
+            ensure_overlap_constraint()
 
         from .routes.groups import groups_bp
         from .routes.events import events_bp
+        from .routes.availability import availability_bp
 
         app.register_blueprint(groups_bp, url_prefix="/groups")        
         app.register_blueprint(events_bp, url_prefix="/events")
+        app.register_blueprint(availability_bp, url_prefix="/availability")
 
     return app
 
@@ -43,4 +59,27 @@ def _wait_for_db_and_create_tables(retries=5, delay=3):
             print(f"Database connection failed (attempt {attempt + 1}/{retries}): {e}")
             time.sleep(delay)
 
-    raise Exception("Could not connect to the database after several attempts.")
\ No newline at end of file
+    raise Exception("Could not connect to the database after several attempts.")
+
+def _backfill_indexes():
+    from sqlalchemy.exc import IntegrityError
+    from .utils.group_overlap import rebuild_group_overlap
+    from .utils.busy_timeline import rebuild_all_busy
+
+    backfills = [
+        ("Group overlap index", GroupOverlap.query, GroupUser, rebuild_group_overlap),
+        # merged blocks from before timelines held one block per event count as missing
+        ("User busy timelines", UserBusy.query.filter(UserBusy.event_id.isnot(None)), Event, rebuild_all_busy),
+    ]
+
+    for name, index_query, source_model, rebuild in backfills:
+        if index_query.first() is not None or source_model.query.first() is None:
+            continue
+
+        try:
+            rebuild()
+            db.session.commit()
+            print(f"{name} rebuilt.")
+        except IntegrityError:
+            # another replica filled it first
+            db.session.rollback()
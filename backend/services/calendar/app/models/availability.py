@@ -4,9 +4,10 @@ class Availability(db.Model):
     __tablename__ = "availability"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("group_user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("group_user.id"), nullable=False, index=True)
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
+    recurrence = db.Column(db.String(10))
     created_at = db.Column(db.DateTime)
     updated_at = db.Column(db.DateTime)
 
@@ -16,6 +17,7 @@ class Availability(db.Model):
             "user_id": self.user_id,
             "start_time": self.start_time,
             "end_time": self.end_time,
+            "recurrence": self.recurrence,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
\ No newline at end of file
@@ -2,6 +2,9 @@ from ..db import db
 
 class Event(db.Model):
     __tablename__ = "event"
+    __table_args__ = (
+        db.Index("ix_event_group_time", "group_id", "start_time", "end_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     group_id = db.Column(db.Integer, db.ForeignKey("group.id"), nullable=False)
@@ -9,6 +12,8 @@ class Event(db.Model):
     description = db.Column(db.String(1024))
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
+    recurrence = db.Column(db.String(255))
+    series_end = db.Column(db.DateTime)
     creation_date = db.Column(db.DateTime)
     last_update = db.Column(db.DateTime)
 
@@ -20,6 +25,8 @@ class Event(db.Model):
             "description": self.description,
             "start_time": self.start_time,
             "end_time": self.end_time,
+            "recurrence": self.recurrence,
+            "series_end": self.series_end,
             "creation_date": self.creation_date,
             "last_update": self.last_update,
         }
\ No newline at end of file
@@ -6,6 +6,7 @@ class Group(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(1024))
+    calendar_version = db.Column(db.Integer, nullable=False, default=0)
     creation_date = db.Column(db.DateTime)
     last_update = db.Column(db.DateTime)
 
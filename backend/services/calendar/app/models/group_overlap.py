@@ -0,0 +1,15 @@
+from ..db import db
+
+class GroupOverlap(db.Model):
+    __tablename__ = "group_overlap"
+
+    group_id = db.Column(db.Integer, db.ForeignKey("group.id"), primary_key=True)
+    other_group_id = db.Column(db.Integer, db.ForeignKey("group.id"), primary_key=True)
+    shared_members = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "group_id": self.group_id,
+            "other_group_id": self.other_group_id,
+            "shared_members": self.shared_members,
+        }
@@ -4,9 +4,9 @@ class GroupUser(db.Model):
     __tablename__ = "group_user"
 
     id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, db.ForeignKey("group.id"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("group.id"), nullable=False, index=True)
     email = db.Column(db.String(255), nullable=False)
-    user_id = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.String(50), nullable=False, index=True)
     role = db.Column(db.String(50), nullable=False)
     joined_date = db.Column(db.DateTime)
 
@@ -1,18 +1,29 @@
+import json
+
 from ..db import db
 
 class Interval(db.Model):
     __tablename__ = "interval"
+    __table_args__ = (
+        db.Index("ix_interval_job_start", "job_id", "start_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey("job.id"), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
-    
+    available = db.Column(db.Integer)
+    missing = db.Column(db.Text)
 
     def to_dict(self):
-        return {
+        interval = {
             "id": self.id,
             "job_id": self.job_id,
             "start_time": self.start_time,
             "end_time": self.end_time
         }
+        if self.available is not None:
+            interval["available"] = self.available
+        if self.missing is not None:
+            interval["missing"] = json.loads(self.missing)
+        return interval
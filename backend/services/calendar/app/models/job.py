@@ -1,10 +1,27 @@
+from datetime import datetime
+
 from ..db import db
 
 class Job(db.Model):
     __tablename__ = "job"
+    __table_args__ = (
+        db.Index("ix_job_group_status", "group_id", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer)
     status = db.Column(db.String(25), nullable=False)
+    cache_key = db.Column(db.String(64), index=True)
+    result_job_id = db.Column(db.Integer, db.ForeignKey("job.id"))
+    result_format = db.Column(db.String(10))
+    slot_duration = db.Column(db.Integer)
+    slot_step = db.Column(db.Integer)
+    parent_job_id = db.Column(db.Integer, db.ForeignKey("job.id"), index=True)
+    shards_pending = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
 
     def to_dict(self):
         return {
@@ -0,0 +1,23 @@
+from ..db import db
+
+class UserBusy(db.Model):
+    __tablename__ = "user_busy"
+    __table_args__ = (
+        db.Index("ix_user_busy_user_time", "user_id", "start_time", "end_time"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(50), nullable=False)
+    # empty only on blocks merged before timelines held one block per event, they are rebuilt on startup
+    event_id = db.Column(db.Integer, db.ForeignKey("event.id"), index=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "event_id": self.event_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+        }
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, g, request
+from ..utils.decorators import jwt_required
+from ..utils.calendar_version import bump_calendar_version
+from ..models.availability import Availability
+from ..models.group_user import GroupUser
+from ..db import db
+from .events import parse_event_time
+
+availability_bp = Blueprint("availability", __name__)
+
+RECURRENCES = ("weekly",)
+
+def current_membership(group_id):
+    return GroupUser.query.filter_by(
+        group_id=group_id,
+        user_id=g.user["keycloak_id"]
+    ).first()
+
+def parse_availability(data):
+    """Validated (start_time, end_time, recurrence) of an availability window"""
+    if not data or not data.get("start_time") or not data.get("end_time"):
+        raise ValueError("start_time and end_time are required")
+
+    start_time = parse_event_time(data["start_time"])
+    end_time = parse_event_time(data["end_time"])
+
+    if start_time >= end_time:
+        raise ValueError("start_time must be before end_time")
+
+    recurrence = data.get("recurrence")
+    if recurrence is not None and recurrence not in RECURRENCES:
+        raise ValueError(f"recurrence must be one of {', '.join(RECURRENCES)}")
+
+    if recurrence == "weekly" and end_time - start_time > timedelta(weeks=1):
+        raise ValueError("A weekly availability window cannot be longer than a week")
+
+    return start_time, end_time, recurrence
+
+@availability_bp.post("/group/<int:group_id>")
+@jwt_required
+def add_availability(group_id):
+    membership = current_membership(group_id)
+    if not membership:
+        return jsonify({"error": "User is not a member of this group"}), 403
+
+    try:
+        start_time, end_time, recurrence = parse_availability(request.get_json())
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    availability = Availability(
+        user_id=membership.id,
+        start_time=start_time,
+        end_time=end_time,
+        recurrence=recurrence,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+
+    db.session.add(availability)
+    bump_calendar_version(group_id)
+    db.session.commit()
+
+    return jsonify(availability.to_dict()), 201
+
+@availability_bp.get("/group/<int:group_id>")
+@jwt_required
+def get_group_availability(group_id):
+    if not current_membership(group_id):
+        return jsonify({"error": "User is not a member of this group"}), 403
+
+    rows = db.session.query(Availability, GroupUser.user_id).join(
+        GroupUser, GroupUser.id == Availability.user_id
+    ).filter(
+        GroupUser.group_id == group_id
+    ).order_by(GroupUser.user_id, Availability.start_time).all()
+
+    availability_list = []
+    for availability, member_id in rows:
+        availability_list.append({**availability.to_dict(), "member_id": member_id})
+
+    return jsonify({"group": group_id, "availability": availability_list}), 200
+
+@availability_bp.put("/group/<int:group_id>/<int:availability_id>")
+@jwt_required
+def update_availability(group_id, availability_id):
+    membership = current_membership(group_id)
+    if not membership:
+        return jsonify({"error": "User is not a member of this group"}), 403
+
+    availability = Availability.query.filter_by(
+        id=availability_id,
+        user_id=membership.id
+    ).first()
+
+    if not availability:
+        return jsonify({"error": "Availability not found"}), 404
+
+    try:
+        start_time, end_time, recurrence = parse_availability(request.get_json())
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    availability.start_time = start_time
+    availability.end_time = end_time
+    availability.recurrence = recurrence
+    availability.updated_at = datetime.utcnow()
+
+    bump_calendar_version(group_id)
+    db.session.commit()
+
+    return jsonify(availability.to_dict()), 200
+
+@availability_bp.delete("/group/<int:group_id>/<int:availability_id>")
+@jwt_required
+def remove_availability(group_id, availability_id):
+    membership = current_membership(group_id)
+    if not membership:
+        return jsonify({"error": "User is not a member of this group"}), 403
+
+    availability = Availability.query.filter_by(
+        id=availability_id,
+        user_id=membership.id
+    ).first()
+
+    if not availability:
+        return jsonify({"error": "Availability not found"}), 404
+
+    db.session.delete(availability)
+    bump_calendar_version(group_id)
+    db.session.commit()
+
+    return jsonify({"message": "Availability deleted successfully"}), 200
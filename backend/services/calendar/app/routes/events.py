@@ -1,21 +1,38 @@
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask import Blueprint, current_app, jsonify, g, request
 from ..utils.decorators import jwt_required, group_role_required
+from ..utils.calendar_version import bump_calendar_version
+from ..utils.busy_timeline import add_busy, remove_busy, group_member_ids
+from ..utils.slots import expand_slots
+from ..utils.admission import take_tokens, too_many_requests
+from ..utils.intervals import find_slots
+from ..utils import availability, recurrence
+from ..utils.event_overlap import is_overlap_violation, lock_group_events
+from ..utils.event_import import plan_import
+from ..utils.ical import parse_ical
+from ..models.availability import Availability
 from ..models.group import Group
+from ..models.group_overlap import GroupOverlap
 from ..models.group_user import GroupUser
 from ..models.event import Event
 from ..models.job import Job
 from ..models.interval import Interval
 from ..db import db
 
-import pika
 import json
+import redis
+from sqlalchemy.exc import IntegrityError
 import uuid
 import time
 
 events_bp = Blueprint("events", __name__)
 
+INTERACTIVE_QUEUE = "suggestions.interactive"
+BULK_QUEUE = "suggestions"
+
+RANK_BY = ("earliest", "least_fragmented")
+
 def acquire_lock(redis_client, lock_key, timeout=5000):
     """Acquire a Redis lock, returns lock_id if successful, None otherwise"""
     lock_id = str(uuid.uuid4())
@@ -42,21 +59,13 @@ def add_event(group_id):
     if not data:
         return jsonify({"error": "Invalid JSON"}), 400
 
-    if not data.get("start_time") or not data.get("end_time"):
-        return jsonify({"error": "start_time and end_time are required"}), 400
+    try:
+        event = build_event(group_id, data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
 
-    if data["start_time"] >= data["end_time"]:
-        return jsonify({"error": "start_time must be before end_time"}), 400
-
-    event = Event(
-        group_id=group_id,
-        title=data.get("title"),
-        description=data.get("description", ""),
-        start_time=data.get("start_time"),
-        end_time=data.get("end_time"),
-        creation_date=datetime.utcnow(),
-        last_update=datetime.utcnow()
-    )
+    if current_app.config["EVENT_OVERLAP_MODE"] == "constraint":
+        return add_event_constrained(group_id, event)
 
     lock_key = f"group:{group_id}:event_lock"
     lock_id = acquire_lock(current_app.redis_client, lock_key, timeout=5000)
@@ -65,29 +74,224 @@ def add_event(group_id):
         return jsonify({"error": "Calendar is busy, try again"}), 409
     
     try:
-        overlap_event = Event.query.filter(
-            Event.group_id == group_id,
-            Event.start_time < event.end_time,
-            Event.end_time > event.start_time
-        ).first()
-        
-        if overlap_event:
+        if overlaps_existing(group_id, event):
             return jsonify({"error": "Event time overlaps with an existing event"}), 400
         
-        db.session.add(event)
-        db.session.commit()
+        save_event(group_id, event)
     finally:
         release_lock(current_app.redis_client, lock_key, lock_id)
 
 
     return jsonify(event.to_dict()), 201
 
+def add_event_constrained(group_id, event):
+    """Add the event without the Redis lock, the database rejects overlapping writes that race each other.
+
+    On databases without exclusion constraints this is only the check below, which is enough for a
+    single writer such as SQLite.
+    """
+    try:
+        lock_group_events(group_id, exclusive=bool(event.recurrence))
+
+        if overlaps_existing(group_id, event):
+            db.session.rollback()
+            return jsonify({"error": "Event time overlaps with an existing event"}), 400
+
+        save_event(group_id, event)
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_overlap_violation(e):
+            return jsonify({"error": "Event time overlaps with an existing event"}), 400
+        raise
+
+    return jsonify(event.to_dict()), 201
+
+def build_event(group_id, data):
+    """Validated, unsaved Event from the request fields of one event"""
+    if not isinstance(data, dict) or not data.get("start_time") or not data.get("end_time"):
+        raise ValueError("start_time and end_time are required")
+
+    start_time = parse_event_time(data["start_time"])
+    end_time = parse_event_time(data["end_time"])
+
+    if start_time >= end_time:
+        raise ValueError("start_time must be before end_time")
+
+    rule = data.get("recurrence")
+    series_end = validate_recurrence(rule, start_time, end_time) if rule else None
+
+    return Event(
+        group_id=group_id,
+        title=data.get("title"),
+        description=data.get("description", ""),
+        start_time=start_time,
+        end_time=end_time,
+        recurrence=rule,
+        series_end=series_end,
+        creation_date=datetime.utcnow(),
+        last_update=datetime.utcnow()
+    )
+
+def overlaps_existing(group_id, event):
+    """Whether the event overlaps any event of the group"""
+    # SQL narrows the candidates to events whose span reaches this one, recurrences are compared arithmetically
+    candidates = Event.query.filter(
+        Event.group_id == group_id,
+        events_reaching(event.start_time, event.series_end if event.recurrence else event.end_time)
+    )
+    new_event = (event.start_time, event.end_time, event.recurrence)
+
+    return any(recurrence.overlaps((other.start_time, other.end_time, other.recurrence), new_event) for other in candidates)
+
+def save_event(group_id, event):
+    db.session.add(event)
+    add_busy(group_member_ids(group_id), [event])
+    # last, the group row stays locked by this update until the commit
+    bump_calendar_version(group_id)
+    db.session.commit()
+
+@events_bp.post("/group/<int:group_id>/import")
+@jwt_required
+@group_role_required("organizer")
+def import_events(group_id):
+    """Add a batch of events in one transaction, reporting for each whether it was created or why not.
+
+    The body is a JSON array of events (or {"events": [...]}) or an iCalendar file, sent as text/calendar
+    or uploaded as "file". Events overlapping the group's calendar or an earlier event of the batch are
+    rejected, the rest are added.
+    """
+    try:
+        items, errors = read_import(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    limit = current_app.config["EVENT_IMPORT_LIMIT"]
+    if len(items) + len(errors) > limit:
+        return jsonify({"error": f"An import can hold at most {limit} events"}), 413
+
+    results = [None] * (len(items) + len(errors))
+    for index, error in errors.items():
+        results[index] = {"index": index, "status": "rejected", "error": error}
+
+    events = {}
+    for index, item in items.items():
+        try:
+            events[index] = build_event(group_id, item)
+        except (TypeError, ValueError) as e:
+            results[index] = {"index": index, "status": "rejected", "error": str(e)}
+
+    if current_app.config["EVENT_OVERLAP_MODE"] == "constraint":
+        try:
+            lock_group_events(group_id, exclusive=True)
+            save_import(group_id, events, results)
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_overlap_violation(e):
+                return jsonify({"error": "Calendar changed during the import, try again"}), 409
+            raise
+    else:
+        lock_key = f"group:{group_id}:event_lock"
+        lock_id = acquire_lock(current_app.redis_client, lock_key, timeout=30000)
+
+        if not lock_id:
+            return jsonify({"error": "Calendar is busy, try again"}), 409
+
+        try:
+            save_import(group_id, events, results)
+        finally:
+            release_lock(current_app.redis_client, lock_key, lock_id)
+
+    imported = sum(result["status"] == "created" for result in results)
+    return jsonify({"imported": imported, "rejected": len(results) - imported, "results": results}), 200
+
+def read_import(req):
+    """({index: event fields}, {index: why it cannot be imported}) of an import request, ValueError when the body is neither form"""
+    upload = req.files.get("file")
+    if upload is not None:
+        text = upload.read().decode("utf-8-sig", errors="replace")
+    elif req.mimetype == "text/calendar":
+        text = req.get_data(as_text=True)
+    else:
+        data = req.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get("events")
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON array of events or an iCalendar file")
+        return dict(enumerate(data)), {}
+
+    if "BEGIN:VCALENDAR" not in text.upper():
+        raise ValueError("Invalid iCalendar file")
+    return parse_ical(text)
+
+def save_import(group_id, events, results):
+    """Check the validated events against the calendar and each other, then add the ones that fit in one commit"""
+    if events:
+        window_start = min(event.start_time for event in events.values())
+        # an unbounded series reaches every later event
+        ends = [event.series_end if event.recurrence else event.end_time for event in events.values()]
+        window_end = None if None in ends else max(ends)
+
+        existing = Event.query.filter(
+            Event.group_id == group_id,
+            events_reaching(window_start, window_end)
+        ).with_entities(Event.start_time, Event.end_time, Event.recurrence)
+
+        decisions = plan_import(
+            {index: (event.start_time, event.end_time, event.recurrence) for index, event in events.items()},
+            [tuple(event) for event in existing]
+        )
+
+        accepted = []
+        for index, error in sorted(decisions.items()):
+            if error is None:
+                accepted.append(index)
+            else:
+                results[index] = {"index": index, "status": "rejected", "error": error}
+                del events[index]
+
+        if accepted:
+            db.session.add_all(events[index] for index in accepted)
+            add_busy(group_member_ids(group_id), [events[index] for index in accepted])
+            # last, the group row stays locked by this update until the commit
+            bump_calendar_version(group_id)
+            # ids are read before the commit, which expires every instance and would reload each one
+            db.session.flush()
+            for index, event in events.items():
+                results[index] = {"index": index, "status": "created", "id": event.id}
+            db.session.commit()
+
 
 @events_bp.get("/group/<int:group_id>")
 @jwt_required
 def get_group_events(group_id):
-    events = Event.query.filter_by(group_id=group_id).all()
-    events_list = [event.to_dict() for event in events]
+    if not request.args.get("start_time") and not request.args.get("end_time"):
+        events = Event.query.filter_by(group_id=group_id).all()
+        events_list = [event.to_dict() for event in events]
+        return jsonify({"group": group_id, "events": events_list}), 200
+
+    try:
+        start_time = parse_event_time(request.args.get("start_time"))
+        end_time = parse_event_time(request.args.get("end_time"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    events = Event.query.filter(
+        Event.group_id == group_id,
+        events_reaching(start_time, end_time)
+    )
+
+    # recurring events are expanded into their occurrences inside the window only
+    events_list = []
+    for event in events:
+        if event.recurrence:
+            spans = recurrence.occurrences(event.start_time, event.end_time, event.recurrence, start_time, end_time)
+        else:
+            spans = [(event.start_time, event.end_time)]
+
+        for occurrence_start, occurrence_end in spans:
+            events_list.append({**event.to_dict(), "start_time": occurrence_start, "end_time": occurrence_end})
+
+    events_list.sort(key=lambda event: event["start_time"])
     return jsonify({"group": group_id, "events": events_list}), 200
 
 @events_bp.delete("group/<int:group_id>")
@@ -103,7 +307,9 @@ def remove_event(group_id):
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
+    remove_busy(event)
     db.session.delete(event)
+    bump_calendar_version(group_id)
     db.session.commit()
     return jsonify({"message": "Event deleted successfully"}), 200
 
@@ -113,51 +319,78 @@ def remove_event(group_id):
 def make_recommendation_request(group_id):
     data = request.get_json()
 
-    job = Job(status="PENDING")
-    db.session.add(job)
-    db.session.commit()
-
     try:
-        start_time = validate_iso_datetime(data["start_time"])
-        end_time = validate_iso_datetime(data["end_time"])
-    except (KeyError, ValueError) as e:
+        # read like event times, so the window compares with the stored events inline and in either worker
+        start_time = parse_event_time(data["start_time"])
+        end_time = parse_event_time(data["end_time"])
+        if start_time >= end_time:
+            raise ValueError("start_time must be before end_time")
+        duration = parse_duration(data["duration"])
+        quorum = validate_quorum(data)
+        ranked = validate_ranking(data)
+        if quorum and ranked:
+            raise ValueError("top_k cannot be combined with quorum scheduling")
+    except (KeyError, TypeError, ValueError) as e:
         return jsonify({"error": str(e)}), 400
 
     job = {
-        "job_id": job.id,
         "group_id": group_id,
         "duration": data["duration"],
-        "start_time": start_time,
-        "end_time": end_time
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        **quorum,
+        **ranked
     }
 
-    lock_key = f"group:{group_id}:recommendation_lock"
-    lock_id = acquire_lock(current_app.redis_client, lock_key, timeout=5000)
-    
-    if not lock_id:
-        max_wait = 10.0  # seconds
-        wait = 0.1
-        elapsed = 0.0
-
-        while elapsed < max_wait:
-            time.sleep(wait)
-            elapsed += wait
-            lock_id = acquire_lock(current_app.redis_client, lock_key, timeout=5000)
-            if lock_id:
-                break
-            wait = min(wait * 2, 2.0)
+    config = current_app.config
+    retry_after = take_tokens(current_app.redis_client, [
+        (f"recommendations:user:{g.user['keycloak_id']}", config["RECOMMENDATION_USER_RATE"], config["RECOMMENDATION_USER_BURST"]),
+        (f"recommendations:group:{group_id}", config["RECOMMENDATION_GROUP_RATE"], config["RECOMMENDATION_GROUP_BURST"]),
+    ])
+    if retry_after:
+        return too_many_requests("Too many recommendation requests, slow down", retry_after)
+
+    cost = estimate_cost(group_id, job)
+
+    # small plain jobs are answered right away, without a job row, a queue round trip or polling
+    inline_limit = current_app.config["INLINE_COST_LIMIT"]
+    if inline_limit and cost <= inline_limit and not quorum and not ranked:
+        slots = inline_slots(group_id, start_time, end_time, duration)
+        return jsonify({
+            "intervals": [{"start_time": start, "end_time": end} for start, end in slots],
+            "status": "DONE",
+            "lane": "inline"
+        }), 200
+
+    # shards of a heavy request stay in the bulk lane with it, so the whole request is routed by its cost
+    queue = INTERACTIVE_QUEUE if cost <= config["INTERACTIVE_COST_LIMIT"] else BULK_QUEUE
+
+    rejection = check_worker_capacity(group_id, queue)
+    if rejection:
+        return rejection
+
+    job_row = Job(status="PENDING", group_id=group_id)
+    db.session.add(job_row)
+    db.session.commit()
+    job = {"job_id": job_row.id, **job}
 
-        if not lock_id:
-            return jsonify({"error": "Calendar is busy, try again"}), 409
-    
+    payloads = [job]
+    if not quorum and not ranked:
+        payloads = shard_job(job, config["RECOMMENDATION_SHARD_DAYS"])
+
+    # the publisher is thread safe, concurrent submissions for a group no longer need to take turns
     try:
-        publish_suggestion_job(job)
-    finally:
-        release_lock(current_app.redis_client, lock_key, lock_id)
+        for payload in payloads:
+            publish_suggestion_job(payload, queue)
+    except Exception as e:
+        print(f"Could not publish recommendation job {job['job_id']}: {e!r}")
+        fail_unpublished_job(job["job_id"], e)
+        return jsonify({"error": "Recommendation workers are unavailable, try again later"}), 503
 
     return jsonify({
             "job_id": job["job_id"],
-            "status": "submitted"
+            "status": "submitted",
+            "lane": "interactive" if queue == INTERACTIVE_QUEUE else "bulk"
         }), 202
 
 @events_bp.get("/recommendations/group/<int:group_id>/job/<int:job_id>")
@@ -170,11 +403,29 @@ def get_interval_recommendations(group_id, job_id):
 
     if not job:
         return jsonify({"error": "No job with this id exists"}), 404
-    
+
+    try:
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    if job.status == "PENDING" and wait > 0:
+        wait_for_job(job.id, min(wait, current_app.config["RECOMMENDATION_MAX_WAIT"]))
+
     if job.status == "PENDING":
         return jsonify({"error": "Job pending"}), 202
-    
-    intervals = Interval.query.filter_by(job_id = job.id).all()
+
+    # the request was served fine, it is the job that failed, like PENDING and DONE that is reported in the body
+    if job.status == "FAILED":
+        return jsonify({"status": job.status, "error": job.error}), 200
+
+    result_job = db.session.get(Job, job.result_job_id) if job.result_job_id else job
+
+    if result_job.result_format == "windows":
+        return get_window_slots(job, result_job)
+
+    # ranked jobs store their slots best first
+    intervals = Interval.query.filter_by(job_id = result_job.id).order_by(Interval.id).all()
 
     if not intervals:
         return jsonify({"error": "No intervals found"}), 404
@@ -184,22 +435,219 @@ def get_interval_recommendations(group_id, job_id):
         "status": job.status
     }), 200
 
-def publish_suggestion_job(payload):
-    connection = pika.BlockingConnection(
-        pika.URLParameters(current_app.config["RABBITMQ_URL"])
+def job_channel(job_id):
+    return f"job:{job_id}:done"
+
+def wait_for_job(job_id, timeout):
+    """Block until the worker announces the job finished or the timeout passes, holding no database connection"""
+    pubsub = current_app.redis_client.pubsub(ignore_subscribe_messages=True)
+    try:
+        pubsub.subscribe(job_channel(job_id))
+
+        # checked again after subscribing, a job finishing in between would otherwise never be announced to us
+        status = db.session.query(Job.status).filter_by(id=job_id).scalar()
+        # ends the read transaction, which also expires the job so it is reloaded once the wait is over
+        db.session.rollback()
+
+        deadline = time.monotonic() + timeout
+        while status == "PENDING":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = pubsub.get_message(timeout=remaining)
+            if message is not None:
+                status = message["data"]
+    except redis.RedisError as e:
+        # waiting is only an optimisation, the client just polls again
+        print(f"Could not wait for job {job_id}: {e}")
+    finally:
+        pubsub.close()
+
+@events_bp.get("/recommendations/publisher")
+@jwt_required
+def get_publisher_stats():
+    return jsonify(current_app.publisher.stats()), 200
+
+@events_bp.get("/recommendations/retention")
+@jwt_required
+def get_retention_stats():
+    """Rows reclaimed so far by the workers' garbage collection of expired jobs"""
+    try:
+        reclaimed = current_app.redis_client.hgetall("metrics:retention")
+    except redis.RedisError as e:
+        return jsonify({"error": "Retention metrics unavailable", "details": str(e)}), 503
+
+    return jsonify({
+        "reclaimed_jobs": int(reclaimed.get("jobs", 0)),
+        "reclaimed_intervals": int(reclaimed.get("intervals", 0)),
+        "last_run": reclaimed.get("last_run")
+    }), 200
+
+def get_window_slots(job, result_job):
+    """Expand one page of slots from the free windows stored for the job"""
+    try:
+        limit = int(request.args.get("limit", 100))
+        cursor = request.args.get("cursor")
+        cursor = parse_event_time(cursor) if cursor else None
+        step_minutes = request.args.get("step")
+        step = timedelta(minutes=int(step_minutes)) if step_minutes else timedelta(seconds=result_job.slot_step)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid limit, cursor or step"}), 400
+
+    if not 1 <= limit <= 1000 or step <= timedelta(0):
+        return jsonify({"error": "limit must be between 1 and 1000 and step must be positive"}), 400
+
+    windows = Interval.query.filter_by(job_id = result_job.id).order_by(Interval.start_time)
+    if cursor is not None:
+        windows = windows.filter(Interval.end_time > cursor)
+
+    slots, next_cursor = expand_slots(
+        ((window.start_time, window.end_time) for window in windows),
+        timedelta(seconds=result_job.slot_duration), step, cursor, limit
     )
-    channel = connection.channel()
 
-    channel.queue_declare(queue="suggestions", durable=True)
+    if not slots:
+        return jsonify({"error": "No intervals found"}), 404
+
+    return jsonify({
+        "intervals": [
+            {"job_id": job.id, "start_time": start, "end_time": end}
+            for start, end in slots
+        ],
+        "status": job.status,
+        "next_cursor": next_cursor.isoformat() if next_cursor else None
+    }), 200
+
+def shard_windows(start_time, end_time, shard_days):
+    """Split a window into back-to-back sub-windows of shard_days days"""
+    shard_length = timedelta(days=shard_days)
+    windows = []
+
+    shard_start = start_time
+    while shard_start < end_time:
+        windows.append((shard_start, min(shard_start + shard_length, end_time)))
+        shard_start += shard_length
 
-    channel.basic_publish(
-        exchange="",
-        routing_key="suggestions",
-        body=json.dumps(payload),
-        properties=pika.BasicProperties(delivery_mode=2)
+    return windows
+
+def shard_job(job, shard_days):
+    """Job payloads for one recommendation request, one per shard when the window is long enough to split.
+
+    Shards are back-to-back: each stores its raw free intervals and the worker finishing the last
+    shard merges them, so slots crossing a shard boundary are found without overlapping shards.
+    """
+    start_time = datetime.fromisoformat(job["start_time"])
+    end_time = datetime.fromisoformat(job["end_time"])
+
+    if shard_days <= 0 or end_time - start_time <= timedelta(days=shard_days):
+        return [job]
+
+    windows = shard_windows(start_time, end_time, shard_days)
+    shards = [Job(status="PENDING", parent_job_id=job["job_id"], group_id=job["group_id"]) for _ in windows]
+    db.session.add_all(shards)
+    Job.query.filter_by(id=job["job_id"]).update({"shards_pending": len(shards)})
+    db.session.commit()
+
+    return [
+        {
+            **job,
+            "job_id": shard.id,
+            "parent_job_id": job["job_id"],
+            "start_time": shard_start.isoformat(),
+            "end_time": shard_end.isoformat()
+        }
+        for shard, (shard_start, shard_end) in zip(shards, windows)
+    ]
+
+def fail_unpublished_job(job_id, error):
+    """Mark a job and its shards FAILED when its messages never reached the broker, so they stop counting as in flight"""
+    db.session.rollback()
+    Job.query.filter(
+        db.or_(Job.id == job_id, Job.parent_job_id == job_id),
+        Job.status == "PENDING"
+    ).update({
+        "status": "FAILED",
+        "error": f"Could not queue the job: {error!r}",
+        "completed_at": datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+
+def check_worker_capacity(group_id, queue):
+    """The 429 response when the group has too many jobs in flight or the lane's backlog is too long, else None"""
+    config = current_app.config
+
+    in_flight_limit = config["RECOMMENDATION_IN_FLIGHT_LIMIT"]
+    if in_flight_limit:
+        # pending jobs older than the window are stuck, nothing will consume them anymore
+        in_flight = Job.query.filter(
+            Job.group_id == group_id,
+            Job.status == "PENDING",
+            Job.parent_job_id.is_(None),
+            Job.created_at >= datetime.utcnow() - timedelta(seconds=config["RECOMMENDATION_IN_FLIGHT_WINDOW"])
+        ).count()
+        if in_flight >= in_flight_limit:
+            return too_many_requests("Too many recommendation jobs in flight for this group", config["RECOMMENDATION_RETRY_AFTER"])
+
+    backlog_limit = config["RECOMMENDATION_BACKLOG_LIMIT"]
+    if backlog_limit:
+        try:
+            backlog = current_app.publisher.queue_depth(queue)
+        except Exception as e:
+            # publishing reports a broker outage on its own
+            print(f"Could not read the {queue} backlog: {e!r}")
+            backlog = 0
+
+        if backlog >= backlog_limit:
+            return too_many_requests("Recommendation workers are overloaded, try again later", config["RECOMMENDATION_RETRY_AFTER"])
+
+    return None
+
+def estimate_cost(group_id, job):
+    """Member-hours of the window, the worker's load and merge work grows with both"""
+    window = datetime.fromisoformat(job["end_time"]) - datetime.fromisoformat(job["start_time"])
+    members = GroupUser.query.filter_by(group_id=group_id).count()
+    return max(window.total_seconds() / 3600, 0) * max(members, 1)
+
+def load_busy_intervals(group_id, start_time, end_time):
+    """The busy set the worker loads for a plain job: every member's events plus time outside the common availability"""
+    affecting = db.session.query(GroupOverlap.other_group_id).filter(GroupOverlap.group_id == group_id)
+    events = db.session.query(Event.start_time, Event.end_time, Event.recurrence).filter(
+        Event.group_id.in_(affecting),
+        events_reaching(start_time, end_time)
     )
+    busy = list(recurrence.expand(events, start_time, end_time))
+
+    rows = db.session.query(GroupUser.user_id, Availability.start_time, Availability.end_time, Availability.recurrence).join(
+        GroupUser, GroupUser.id == Availability.user_id
+    ).filter(
+        GroupUser.group_id == group_id,
+        Availability.start_time < end_time,
+        db.or_(Availability.end_time > start_time, Availability.recurrence == "weekly")
+    )
+    user_ids = db.session.query(GroupUser.user_id).filter(
+        GroupUser.group_id == group_id,
+        db.session.query(Availability.id).filter(Availability.user_id == GroupUser.id).exists()
+    )
+    available = availability.member_availability(rows, start_time, end_time, [user_id for user_id, in user_ids])
+
+    return busy + availability.common_unavailable(available, start_time, end_time)
+
+def inline_slots(group_id, start_time, end_time, duration):
+    """Slots of a small job computed in the request with the worker's Python engine"""
+    return find_slots(load_busy_intervals(group_id, start_time, end_time), start_time, end_time, duration)
+
+def publish_suggestion_job(payload, queue=BULK_QUEUE):
+    current_app.publisher.publish(queue, json.dumps(payload))
 
-    connection.close()
+def parse_duration(value):
+    """The job duration the way the worker reads it"""
+    if not isinstance(value, dict):
+        raise ValueError("duration must be an object with hours and minutes")
+
+    duration = timedelta(hours=value.get("hours", 0), minutes=value.get("minutes", 0))
+    if duration <= timedelta(0):
+        raise ValueError("duration must be positive")
+    return duration
 
 def validate_iso_datetime(value):
     try:
@@ -210,3 +658,88 @@ def validate_iso_datetime(value):
         )
 
     return value
+
+
+def validate_quorum(data):
+    """Optional quorum parameters, a slot then only needs min_attendees (or min_fraction) of the members free"""
+    quorum = {}
+
+    min_attendees = data.get("min_attendees")
+    min_fraction = data.get("min_fraction")
+
+    if min_attendees is not None:
+        if isinstance(min_attendees, bool) or not isinstance(min_attendees, int) or min_attendees < 1:
+            raise ValueError("min_attendees must be a positive integer")
+        quorum["min_attendees"] = min_attendees
+    elif min_fraction is not None:
+        if isinstance(min_fraction, bool) or not isinstance(min_fraction, (int, float)) or not 0 < min_fraction <= 1:
+            raise ValueError("min_fraction must be a number in (0, 1]")
+        quorum["min_fraction"] = min_fraction
+
+    if quorum and data.get("include_missing"):
+        quorum["include_missing"] = True
+
+    return quorum
+
+def validate_ranking(data):
+    """Optional ranking parameters, the job then keeps only the top_k best slots"""
+    top_k = data.get("top_k")
+    if top_k is None:
+        return {}
+
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or not 1 <= top_k <= 1000:
+        raise ValueError("top_k must be an integer between 1 and 1000")
+    ranked = {"top_k": top_k, "rank_by": data.get("rank_by", "earliest")}
+
+    if ranked["rank_by"] not in RANK_BY:
+        raise ValueError(f"rank_by must be one of {', '.join(RANK_BY)}")
+
+    preferred_hours = data.get("preferred_hours")
+    if preferred_hours is not None:
+        if (
+            not isinstance(preferred_hours, list) or len(preferred_hours) != 2
+            or any(isinstance(hour, bool) or not isinstance(hour, int) for hour in preferred_hours)
+            or not 0 <= preferred_hours[0] < preferred_hours[1] <= 24
+        ):
+            raise ValueError("preferred_hours must be [first_hour, last_hour] with 0 <= first_hour < last_hour <= 24")
+        ranked["preferred_hours"] = preferred_hours
+
+    buffer_minutes = data.get("buffer_minutes", 0)
+    if isinstance(buffer_minutes, bool) or not isinstance(buffer_minutes, int) or buffer_minutes < 0:
+        raise ValueError("buffer_minutes must be a non-negative integer")
+    if buffer_minutes:
+        ranked["buffer_minutes"] = buffer_minutes
+
+    return ranked
+
+def validate_recurrence(rule, start_time, end_time):
+    """Validate an RRULE subset for the event, returns the end of its last occurrence (None if endless)"""
+    if not isinstance(rule, str):
+        raise ValueError("recurrence must be an RRULE string")
+
+    period = recurrence.parse_rule(rule)[0]
+
+    if end_time - start_time > period:
+        raise ValueError("An occurrence cannot be longer than the recurrence interval")
+
+    if recurrence.occurrence_count(start_time, rule) == 0:
+        raise ValueError("UNTIL is before the first occurrence")
+
+    return recurrence.series_end(start_time, end_time, rule)
+
+def events_reaching(start_time, end_time=None):
+    """Single events overlapping the window and recurring events still running in it, end_time None is unbounded"""
+    recurring = db.and_(
+        Event.recurrence.isnot(None),
+        db.or_(Event.series_end.is_(None), Event.series_end > start_time)
+    )
+    condition = db.or_(Event.end_time > start_time, recurring)
+
+    if end_time is not None:
+        condition = db.and_(Event.start_time < end_time, condition)
+    return condition
+
+def parse_event_time(value):
+    """Parse an ISO-8601 event time the way a timestamp column stores it, ignoring any UTC offset"""
+    validate_iso_datetime(value)
+    return datetime.fromisoformat(value).replace(tzinfo=None)
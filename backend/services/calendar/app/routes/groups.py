@@ -2,8 +2,12 @@ import requests
 from datetime import datetime
 from flask import Blueprint, current_app, jsonify, g, request
 from ..utils.decorators import jwt_required, group_role_required
+from ..utils.calendar_version import bump_calendar_version
+from ..utils.group_overlap import add_member_overlap, remove_member_overlap, remove_group_overlap
+from ..utils.busy_timeline import add_member_busy, remove_member_busy, remove_group_busy
 from ..models.group import Group
 from ..models.group_user import GroupUser
+from ..models.availability import Availability
 from ..db import db
 
 groups_bp = Blueprint("groups", __name__)
@@ -34,6 +38,7 @@ def add_group():
     )
 
     db.session.add(group_user)
+    add_member_overlap(group.id, group_user.user_id)
     db.session.commit()
 
     return jsonify({"message": "Group created successfully",
@@ -79,7 +84,12 @@ def delete_group(group_id):
     if not group:
         return jsonify({"error": "Group not found"}), 404
 
+    Availability.query.filter(
+        Availability.user_id.in_(db.session.query(GroupUser.id).filter_by(group_id=group_id))
+    ).delete(synchronize_session=False)
     GroupUser.query.filter_by(group_id=group_id).delete(synchronize_session=False)
+    remove_group_overlap(group_id)
+    remove_group_busy(group_id)
 
     db.session.delete(group)
     db.session.commit()
@@ -123,6 +133,9 @@ def add_group_member(group_id):
     )
 
     db.session.add(new_member)
+    add_member_overlap(group_id, target_user_id)
+    add_member_busy(group_id, target_user_id)
+    bump_calendar_version(group_id)
     db.session.commit()
 
     return jsonify({
@@ -228,7 +241,11 @@ def remove_group_member(group_id):
         email=email
     ).first()
 
+    Availability.query.filter_by(user_id=user.id).delete(synchronize_session=False)
     db.session.delete(user)
+    remove_member_overlap(group_id, user.user_id)
+    remove_member_busy(group_id, user.user_id)
+    bump_calendar_version(group_id)
     db.session.commit()
 
     return jsonify({"message": "User removed from group"}), 200
\ No newline at end of file
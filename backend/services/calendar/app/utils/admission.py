@@ -0,0 +1,62 @@
+import math
+
+import redis
+from flask import jsonify
+
+# Takes one token from every bucket or from none of them. ARGV holds (rate per second, burst) for each key.
+# Returns "0" when admitted, otherwise the seconds until every bucket has a token again.
+TOKEN_BUCKETS = """
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local wait = 0
+
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call("HMGET", key, "tokens", "updated")
+    local available = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+
+    tokens[i] = math.min(burst, available + math.max(0, now - updated) * rate)
+    if tokens[i] < 1 then
+        wait = math.max(wait, (1 - tokens[i]) / rate)
+    end
+end
+
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    if wait == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call("HSET", key, "tokens", tokens[i], "updated", now)
+    redis.call("PEXPIRE", key, math.ceil(burst / rate * 1000) + 1000)
+end
+
+return tostring(wait)
+"""
+
+def take_tokens(redis_client, buckets):
+    """Take a token from every (key, per_minute, burst) bucket at once, returns 0 or the seconds to retry after.
+
+    Buckets with a rate of 0 are not limited. Redis being unreachable admits the request, the limits
+    protect the workers but are not worth failing submissions over.
+    """
+    buckets = [(key, per_minute, burst) for key, per_minute, burst in buckets if per_minute > 0]
+    if not buckets:
+        return 0
+
+    args = []
+    for _, per_minute, burst in buckets:
+        args += [per_minute / 60, max(burst, 1)]
+
+    try:
+        script = redis_client.register_script(TOKEN_BUCKETS)
+        wait = float(script(keys=[key for key, _, _ in buckets], args=args))
+    except redis.RedisError as e:
+        print(f"Rate limiting skipped, Redis unavailable: {e}")
+        return 0
+
+    return math.ceil(wait)
+
+def too_many_requests(error, retry_after):
+    return jsonify({"error": error, "retry_after": retry_after}), 429, {"Retry-After": str(retry_after)}
@@ -0,0 +1,74 @@
+import sqlalchemy as sa
+
+from ..db import db
+from ..models.event import Event
+from ..models.group_user import GroupUser
+from ..models.user_busy import UserBusy
+
+# A user's timeline holds one block per single event of their groups, merged by the worker when it reads
+# them. Changes only insert or delete their own event's blocks and never rewrite a block another write
+# could be changing, so writers of different groups sharing members never wait for each other.
+
+def group_member_ids(group_id):
+    return [member.user_id for member in GroupUser.query.filter_by(group_id=group_id)]
+
+def _group_blocks(group_id):
+    """Select (event_id, start_time, end_time) of the group's single events"""
+    # recurring events are expanded by the worker at read time, timelines only hold single events
+    return sa.select(Event.id, Event.start_time, Event.end_time).where(
+        Event.group_id == group_id,
+        Event.recurrence.is_(None)
+    )
+
+def add_busy(user_ids, events):
+    """Add a block for each single event to the timeline of every given user"""
+    events = [event for event in events if not event.recurrence]
+    if not user_ids or not events:
+        return
+
+    # blocks point at their event, which needs its id first
+    db.session.flush()
+    db.session.execute(sa.insert(UserBusy.__table__), [
+        {"user_id": user_id, "event_id": event.id, "start_time": event.start_time, "end_time": event.end_time}
+        for user_id in set(user_ids)
+        for event in events
+    ])
+
+def remove_busy(event):
+    """Drop the event's block from every timeline, before the event itself is deleted"""
+    UserBusy.query.filter_by(event_id=event.id).delete(synchronize_session=False)
+
+def add_member_busy(group_id, user_id):
+    """Add the group's events to the timeline of a new member"""
+    blocks = _group_blocks(group_id).subquery()
+    db.session.execute(
+        sa.insert(UserBusy.__table__).from_select(
+            ["user_id", "event_id", "start_time", "end_time"],
+            sa.select(sa.literal(user_id), blocks.c.id, blocks.c.start_time, blocks.c.end_time)
+        )
+    )
+
+def remove_member_busy(group_id, user_id):
+    """Drop the group's events from the timeline of a member leaving it"""
+    UserBusy.query.filter(
+        UserBusy.user_id == user_id,
+        UserBusy.event_id.in_(_group_blocks(group_id).with_only_columns(Event.id))
+    ).delete(synchronize_session=False)
+
+def remove_group_busy(group_id):
+    """Drop the group's events from the timelines of all its members"""
+    UserBusy.query.filter(
+        UserBusy.event_id.in_(_group_blocks(group_id).with_only_columns(Event.id))
+    ).delete(synchronize_session=False)
+
+def rebuild_all_busy():
+    """Recompute every timeline from group_user and the events in one statement"""
+    UserBusy.query.delete(synchronize_session=False)
+    db.session.execute(
+        sa.insert(UserBusy.__table__).from_select(
+            ["user_id", "event_id", "start_time", "end_time"],
+            sa.select(GroupUser.user_id, Event.id, Event.start_time, Event.end_time)
+            .join(GroupUser, GroupUser.group_id == Event.group_id)
+            .where(Event.recurrence.is_(None))
+        )
+    )
@@ -0,0 +1,8 @@
+from ..models.group import Group
+
+def bump_calendar_version(group_id):
+    """Invalidate cached recommendation results that depend on the group's busy time"""
+    Group.query.filter_by(id=group_id).update(
+        {Group.calendar_version: Group.calendar_version + 1},
+        synchronize_session=False
+    )
@@ -0,0 +1,52 @@
+from . import recurrence
+
+OVERLAPS_EXISTING = "Event time overlaps with an existing event"
+
+
+def plan_import(events, existing):
+    """Decide which {index: (start, end, recurrence)} events of a batch can be added, index -> None or why it is rejected.
+
+    existing are the group's events reaching the batch's span. Single events are swept once in start
+    order against the existing single events and the batch events accepted before them, recurring
+    ones are compared arithmetically against everything else, so a single event wins over a series it clashes with.
+    """
+    decisions = {}
+    accepted = []
+
+    existing_single = sorted((start, end) for start, end, rule in existing if not rule)
+    existing_series = [event for event in existing if event[2]]
+
+    position = 0
+    previous = None
+    for index in sorted((index for index, event in events.items() if not event[2]), key=lambda index: events[index][0]):
+        start, end, _ = events[index]
+
+        # existing single events never overlap each other, so they end in the same order they start
+        while position < len(existing_single) and existing_single[position][1] <= start:
+            position += 1
+
+        if position < len(existing_single) and existing_single[position][0] < end:
+            decisions[index] = OVERLAPS_EXISTING
+        elif any(recurrence.overlaps(series, events[index]) for series in existing_series):
+            decisions[index] = OVERLAPS_EXISTING
+        elif previous is not None and start < events[previous][1]:
+            decisions[index] = f"Event time overlaps with event {previous} of the import"
+        else:
+            decisions[index] = None
+            accepted.append(index)
+            previous = index
+
+    for index, event in events.items():
+        if not event[2]:
+            continue
+
+        conflict = next((other for other in accepted if recurrence.overlaps(events[other], event)), None)
+        if any(recurrence.overlaps(other, event) for other in existing):
+            decisions[index] = OVERLAPS_EXISTING
+        elif conflict is not None:
+            decisions[index] = f"Event time overlaps with event {conflict} of the import"
+        else:
+            decisions[index] = None
+            accepted.append(index)
+
+    return decisions
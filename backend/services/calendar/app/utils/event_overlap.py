@@ -0,0 +1,54 @@
+from ..db import db
+
+CONSTRAINT_NAME = "event_no_overlap"
+# SQLSTATE of an exclusion constraint violation
+EXCLUSION_VIOLATION = "23P01"
+# first key of the advisory locks taken on a group's events, keeps them apart from any other advisory lock
+EVENT_LOCK_CLASS = 1
+
+def is_postgresql():
+    return db.engine.dialect.name == "postgresql"
+
+def ensure_overlap_constraint():
+    """Have PostgreSQL keep every group's single events from overlapping, nothing to do on other databases"""
+    if not is_postgresql():
+        return
+
+    if db.session.execute(
+        db.text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+        {"name": CONSTRAINT_NAME}
+    ).first():
+        return
+
+    try:
+        db.session.execute(db.text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        # tsrange is [start, end), so back-to-back events do not conflict, recurring series are checked by the application
+        db.session.execute(db.text(
+            f"ALTER TABLE event ADD CONSTRAINT {CONSTRAINT_NAME} "
+            "EXCLUDE USING gist (group_id WITH =, tsrange(start_time, end_time) WITH &&) "
+            "WHERE (recurrence IS NULL)"
+        ))
+        db.session.commit()
+        print("Event overlap constraint created.")
+    except Exception as e:
+        # another replica created it first, or existing events already overlap
+        db.session.rollback()
+        print(f"Event overlap constraint not created: {e}")
+
+def lock_group_events(group_id, exclusive):
+    """Transaction-scoped advisory lock on the group's events.
+
+    Single events only take it shared, the constraint already keeps them apart, so they are added
+    in parallel. A recurring series cannot be expressed as one range and takes it exclusively.
+    """
+    if not is_postgresql():
+        return
+
+    function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    db.session.execute(
+        db.text(f"SELECT {function}(:lock_class, :group_id)"),
+        {"lock_class": EVENT_LOCK_CLASS, "group_id": group_id}
+    )
+
+def is_overlap_violation(error):
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
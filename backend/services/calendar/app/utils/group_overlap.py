@@ -0,0 +1,77 @@
+import sqlalchemy as sa
+from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..db import db
+from ..models.group_overlap import GroupOverlap
+from ..models.group_user import GroupUser
+
+def _adjust(group_id, other_group_id, delta):
+    if delta < 0:
+        GroupOverlap.query.filter_by(
+            group_id=group_id,
+            other_group_id=other_group_id
+        ).update(
+            {GroupOverlap.shared_members: GroupOverlap.shared_members + delta},
+            synchronize_session=False
+        )
+        return
+
+    # one upsert, so two members added concurrently to the same pair of groups cannot both insert the row
+    insert = postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert
+    table = GroupOverlap.__table__
+    db.session.execute(
+        insert(table)
+        .values(group_id=group_id, other_group_id=other_group_id, shared_members=delta)
+        .on_conflict_do_update(
+            index_elements=[table.c.group_id, table.c.other_group_id],
+            set_={"shared_members": table.c.shared_members + delta}
+        )
+    )
+
+def _adjust_pairs(group_id, user_id, delta):
+    other_group_ids = {
+        membership.group_id
+        for membership in GroupUser.query.filter_by(user_id=user_id)
+        if membership.group_id != group_id
+    }
+
+    _adjust(group_id, group_id, delta)
+    for other_group_id in other_group_ids:
+        _adjust(group_id, other_group_id, delta)
+        _adjust(other_group_id, group_id, delta)
+
+    return other_group_ids
+
+def add_member_overlap(group_id, user_id):
+    """Count a new member of the group towards every group it shares with the user's other groups"""
+    _adjust_pairs(group_id, user_id, 1)
+
+def remove_member_overlap(group_id, user_id):
+    """Undo add_member_overlap once the membership row is gone"""
+    other_group_ids = _adjust_pairs(group_id, user_id, -1)
+
+    GroupOverlap.query.filter(
+        GroupOverlap.group_id.in_(other_group_ids | {group_id}),
+        GroupOverlap.shared_members <= 0
+    ).delete(synchronize_session=False)
+
+def remove_group_overlap(group_id):
+    GroupOverlap.query.filter(
+        sa.or_(GroupOverlap.group_id == group_id, GroupOverlap.other_group_id == group_id)
+    ).delete(synchronize_session=False)
+
+def rebuild_group_overlap():
+    """Recompute the whole index from group_user in one statement"""
+    member = orm.aliased(GroupUser)
+    co_member = orm.aliased(GroupUser)
+
+    GroupOverlap.query.delete(synchronize_session=False)
+    db.session.execute(
+        sa.insert(GroupOverlap.__table__).from_select(
+            ["group_id", "other_group_id", "shared_members"],
+            sa.select(member.group_id, co_member.group_id, sa.func.count())
+            .join(co_member, co_member.user_id == member.user_id)
+            .group_by(member.group_id, co_member.group_id)
+        )
+    )
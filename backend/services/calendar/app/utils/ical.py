@@ -0,0 +1,99 @@
+import re
+from datetime import datetime, timedelta
+
+DURATION = re.compile(r"^P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+UNSUPPORTED = ("RDATE", "EXDATE", "EXRULE")
+
+
+def unfold(text):
+    """Content lines of an iCalendar file, continuation lines joined back onto the line they belong to"""
+    lines = []
+    for line in text.replace("\r\n", "\n").split("\n"):
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+def parse_line(line):
+    """(NAME, {PARAM: value}, value) of a content line"""
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    return name.upper(), dict(param.partition("=")[::2] for param in params), value
+
+def unescape(value):
+    return re.sub(r"\\([\\;,nN])", lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+def parse_date_time(value, params):
+    """Naive date-time of a DATE or DATE-TIME value, a UTC marker or TZID is dropped like event times elsewhere"""
+    value = value.strip()
+    if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+    return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+
+def parse_duration(value):
+    match = DURATION.match(value.strip().lstrip("+"))
+    if not match or not any(match.groups()):
+        raise ValueError(f"Invalid DURATION {value!r}")
+    weeks, days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+def _event_fields(properties):
+    start_time = parse_date_time(*properties["DTSTART"])
+    all_day = len(properties["DTSTART"][0].strip()) == 8
+
+    if "DTEND" in properties:
+        end_time = parse_date_time(*properties["DTEND"])
+    elif "DURATION" in properties:
+        end_time = start_time + parse_duration(properties["DURATION"][0])
+    else:
+        # RFC 5545: a date lasts the whole day, a date-time without an end is an instant
+        end_time = start_time + (timedelta(days=1) if all_day else timedelta(0))
+
+    event = {
+        "title": unescape(properties["SUMMARY"][0]) if "SUMMARY" in properties else None,
+        "description": unescape(properties["DESCRIPTION"][0]) if "DESCRIPTION" in properties else "",
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+    }
+    if "RRULE" in properties:
+        event["recurrence"] = properties["RRULE"][0]
+    return event
+
+def parse_ical(text):
+    """The VEVENTs of an iCalendar file as event request fields, and why the ones that cannot be imported were skipped.
+
+    Both are keyed by the VEVENT's position in the file.
+    """
+    events = {}
+    errors = {}
+    properties = None
+    # depth of components nested inside the current VEVENT, such as VALARM, whose properties are skipped
+    nested = 0
+
+    for line in unfold(text):
+        name, params, value = parse_line(line)
+
+        if properties is not None and name in ("BEGIN", "END") and value.upper() != "VEVENT":
+            nested += 1 if name == "BEGIN" else -1
+        elif nested:
+            continue
+        elif name == "BEGIN" and value.upper() == "VEVENT":
+            properties = {}
+        elif name == "END" and value.upper() == "VEVENT" and properties is not None:
+            index = len(events) + len(errors)
+            unsupported = [key for key in UNSUPPORTED if key in properties]
+            if unsupported:
+                errors[index] = f"{', '.join(unsupported)} is not supported"
+            elif "DTSTART" not in properties:
+                errors[index] = "DTSTART is required"
+            else:
+                try:
+                    events[index] = _event_fields(properties)
+                except ValueError as e:
+                    errors[index] = str(e)
+            properties = None
+        elif properties is not None and name not in properties:
+            properties[name] = (value, params)
+
+    return events, errors
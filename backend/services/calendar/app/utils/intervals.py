@@ -0,0 +1,81 @@
+# Kept in sync with services/worker/intervals.py
+import heapq
+from datetime import timedelta
+
+
+def merge_intervals(intervals):
+    if not intervals:
+        return []
+
+    intervals.sort(key=lambda x: x[0])
+
+    merged = []
+    current_start, current_end = intervals[0]
+
+    for start, end in intervals[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+        else:
+            merged.append((current_start, current_end))
+            current_start, current_end = start, end
+
+    merged.append((current_start, current_end))
+    return merged
+
+def merge_timelines(timelines):
+    """k-way merge of timelines that are each sorted by start"""
+    merged = []
+    for start, end in heapq.merge(*timelines):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+def free_intervals(intervals, start_time, end_time):
+    if not intervals:
+        return [(start_time, end_time)]
+    free = []
+
+    if start_time < intervals[0][0]:
+        free.append((start_time, intervals[0][0]))
+
+    for i in range(len(intervals) - 1):
+        free.append((intervals[i][1], intervals[i + 1][0]))
+
+    if intervals[-1][1] < end_time:
+        free.append((intervals[-1][1], end_time))
+
+    return free
+
+def fitting_windows(free, duration):
+    """Free intervals long enough to hold at least one slot"""
+    return [(start, end) for start, end in free if start + duration <= end]
+
+def generate_slots(free, duration):
+    """Split every free interval into back-to-back slots of the given duration"""
+    if duration <= timedelta(0):
+        raise ValueError("duration must be positive")
+
+    slots = []
+    for start, end in free:
+        while start + duration <= end:
+            slots.append((start, start + duration))
+            start += duration
+
+    return slots
+
+def find_slots(intervals, start_time, end_time, duration):
+    """Busy intervals in, back-to-back free slots of the given duration out"""
+    free = free_intervals(merge_intervals(intervals), start_time, end_time)
+    return generate_slots(free, duration)
+
+def find_free(intervals, start_time, end_time):
+    """Busy intervals in, every free interval of the window out"""
+    return free_intervals(merge_intervals(intervals), start_time, end_time)
+
+def find_windows(intervals, start_time, end_time, duration):
+    """Busy intervals in, free windows that fit at least one slot of the given duration out"""
+    free = free_intervals(merge_intervals(intervals), start_time, end_time)
+    return fitting_windows(free, duration)
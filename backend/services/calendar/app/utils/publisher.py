@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import pika
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
+
+class _PooledChannel:
+    def __init__(self, parameters):
+        self.connection = pika.BlockingConnection(parameters)
+        self.channel = self.connection.channel()
+        self.channel.confirm_delivery()
+        self.declared = set()
+
+    def close(self):
+        try:
+            if self.connection.is_open:
+                self.connection.close()
+        except Exception:
+            pass
+
+class Publisher:
+    """Long-lived, confirmed RabbitMQ publisher shared by the request threads of one process.
+
+    pika connections are not thread safe, so every publish borrows a whole connection from a small
+    pool and hands it back afterwards. Broken connections are dropped and replaced on the next
+    publish, which is retried once on a fresh connection.
+    """
+
+    def __init__(self, url, pool_size=4, latency_samples=1000):
+        self.parameters = pika.URLParameters(url) if url else None
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(pool_size)
+        self.pool_size = pool_size
+
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=latency_samples)
+        self.published = 0
+        self.failed = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.last_reconnect = None
+        self.depths = {}
+
+    def _checkout(self):
+        """An idle connection that is still alive, or None when a new one has to be opened"""
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            try:
+                # services heartbeats that piled up while idle and surfaces a connection the broker dropped
+                pooled.connection.process_data_events(time_limit=0)
+                return pooled
+            except (AMQPConnectionError, AMQPChannelError) as e:
+                self._discard(pooled, e)
+
+    def _connect(self):
+        pooled = _PooledChannel(self.parameters)
+        with self.lock:
+            self.connections_opened += 1
+        return pooled
+
+    def _discard(self, pooled, error):
+        pooled.close()
+        with self.lock:
+            self.reconnects += 1
+            self.last_error = repr(error)
+            self.last_reconnect = time.time()
+        print(f"RabbitMQ publisher connection lost, reconnecting: {error!r}")
+
+    def _publish(self, pooled, routing_key, body):
+        if routing_key not in pooled.declared:
+            pooled.channel.queue_declare(queue=routing_key, durable=True)
+            pooled.declared.add(routing_key)
+
+        # with confirms on this blocks until the broker has taken the message, a nack raises
+        pooled.channel.basic_publish(
+            exchange="",
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2),
+            mandatory=True
+        )
+
+    def _borrow(self, operation):
+        """Run operation(pooled) on a pooled connection, once more on a fresh one if the connection breaks"""
+        if self.parameters is None:
+            raise RuntimeError("RABBITMQ_URL is not configured")
+
+        with self.slots:
+            pooled = self._checkout()
+            try:
+                for attempt in range(2):
+                    try:
+                        pooled = pooled or self._connect()
+                        return operation(pooled)
+                    except (AMQPConnectionError, AMQPChannelError) as e:
+                        if pooled is not None:
+                            self._discard(pooled, e)
+                            pooled = None
+                        if attempt:
+                            raise
+            finally:
+                if pooled is not None:
+                    self.idle.put(pooled)
+
+    def publish(self, routing_key, body):
+        """Publish a persistent message to the queue and wait for the broker's confirm"""
+        started = time.perf_counter()
+        try:
+            self._borrow(lambda pooled: self._publish(pooled, routing_key, body))
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+                self.last_error = repr(e)
+            raise
+
+        with self.lock:
+            self.published += 1
+            self.latencies.append(time.perf_counter() - started)
+
+    def queue_depth(self, routing_key, max_age=1.0):
+        """Messages ready in the queue, re-read from the broker at most every max_age seconds"""
+        with self.lock:
+            cached = self.depths.get(routing_key)
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+        def read(pooled):
+            pooled.declared.add(routing_key)
+            return pooled.channel.queue_declare(queue=routing_key, durable=True).method.message_count
+
+        depth = self._borrow(read)
+        with self.lock:
+            self.depths[routing_key] = (time.monotonic(), depth)
+        return depth
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                "published": self.published,
+                "failed": self.failed,
+                "connections_opened": self.connections_opened,
+                "reconnects": self.reconnects,
+                "last_error": self.last_error,
+                "last_reconnect": self.last_reconnect,
+                "pool_size": self.pool_size,
+                "idle_connections": self.idle.qsize(),
+            }
+
+        if latencies:
+            stats["latency_ms"] = {
+                "samples": len(latencies),
+                "avg": 1000 * sum(latencies) / len(latencies),
+                "p50": 1000 * latencies[len(latencies) // 2],
+                "p95": 1000 * latencies[int(len(latencies) * 0.95)],
+                "max": 1000 * latencies[-1],
+            }
+        return stats
@@ -0,0 +1,57 @@
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+
+from ..db import db
+
+def upgrade_tables():
+    """Add the columns and indexes the models gained after their tables were created, create_all only adds tables.
+
+    This only ever adds: a missing column (with the model's scalar default and foreign keys) and a
+    missing index. It never changes a column's type, nullability or default, never adds or changes
+    constraints of existing columns, and never drops or renames anything; those need a hand-written
+    migration. A column that cannot be added, such as a NOT NULL one without a scalar default on a
+    table with rows, is logged and skipped. SCHEMA_UPGRADE=false turns it off.
+    """
+    dialect = db.engine.dialect
+    inspector = sa.inspect(db.engine)
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+
+            definition = str(CreateColumn(column).compile(dialect=dialect))
+            # existing rows need a value for NOT NULL columns, the model's default is used for them
+            if column.default is not None and column.default.is_scalar:
+                value = sa.literal(column.default.arg).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+                definition += f" DEFAULT {value}"
+            for foreign_key in column.foreign_keys:
+                target = foreign_key.column
+                definition += f" REFERENCES {dialect.identifier_preparer.format_table(target.table)} ({target.name})"
+
+            try:
+                db.session.execute(db.text(
+                    f"ALTER TABLE {dialect.identifier_preparer.format_table(table)} ADD COLUMN {definition}"
+                ))
+                db.session.commit()
+                print(f"Column {table.name}.{column.name} added.")
+            except SQLAlchemyError as e:
+                # another replica added it first
+                db.session.rollback()
+                print(f"Column {table.name}.{column.name} not added: {e}")
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in indexes:
+                continue
+
+            try:
+                index.create(db.engine, checkfirst=True)
+                print(f"Index {index.name} created.")
+            except SQLAlchemyError as e:
+                print(f"Index {index.name} not created: {e}")
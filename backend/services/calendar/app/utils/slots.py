@@ -0,0 +1,27 @@
+from itertools import islice
+
+def _window_slots(window_start, window_end, duration, step, cursor):
+    slot_start = window_start
+    if cursor is not None and cursor > window_start:
+        # jump straight to the first start at or after the cursor instead of walking the window
+        slot_start = window_start - ((window_start - cursor) // step) * step
+
+    while slot_start + duration <= window_end:
+        yield slot_start, slot_start + duration
+        slot_start += step
+
+def expand_slots(windows, duration, step, cursor=None, limit=100):
+    """Expand stored free windows into at most `limit` slots starting at or after `cursor`.
+
+    Returns the slots and the cursor of the next page, or None on the last page.
+    """
+    slots = (
+        slot
+        for window_start, window_end in windows
+        for slot in _window_slots(window_start, window_end, duration, step, cursor)
+    )
+    page = list(islice(slots, limit + 1))
+
+    if len(page) > limit:
+        return page[:limit], page[limit][0]
+    return page, None
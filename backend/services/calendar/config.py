@@ -2,6 +2,8 @@ import os
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("CALENDAR_DATABASE_URL")
+    # add the columns and indexes models gained to existing tables at startup, false leaves the schema to migrations
+    SCHEMA_UPGRADE = os.getenv("SCHEMA_UPGRADE", "true").lower() == "true"
 
     KEYCLOAK_URL = os.getenv("KEYCLOAK_URL")
     KEYCLOAK_REALM = os.getenv("KEYCLOAK_REALM")
@@ -9,5 +11,32 @@ class Config:
 
     PROFILE_SERVICE_URL = os.getenv("PROFILE_SERVICE_URL")
     REDIS_NODES = os.getenv("REDIS_NODES")
+    # "lock" serializes event writes per group with a Redis lock, "constraint" leaves overlaps to a PostgreSQL exclusion constraint
+    EVENT_OVERLAP_MODE = os.getenv("EVENT_OVERLAP_MODE", "lock")
+    # most events a single bulk import may contain
+    EVENT_IMPORT_LIMIT = int(os.getenv("EVENT_IMPORT_LIMIT", "5000"))
 
-    RABBITMQ_URL = os.getenv("RABBITMQ_URL")
\ No newline at end of file
+    RABBITMQ_URL = os.getenv("RABBITMQ_URL")
+    # connections each calendar process keeps open for publishing jobs
+    RABBITMQ_PUBLISHER_POOL = int(os.getenv("RABBITMQ_PUBLISHER_POOL", "4"))
+    # longest ?wait= a results request may block for, in seconds
+    RECOMMENDATION_MAX_WAIT = int(os.getenv("RECOMMENDATION_MAX_WAIT", "30"))
+    # recommendation windows longer than this are split into shards of this many days, 0 disables sharding
+    RECOMMENDATION_SHARD_DAYS = int(os.getenv("RECOMMENDATION_SHARD_DAYS", "7"))
+    # jobs costing at most this many member-hours go to the interactive lane
+    INTERACTIVE_COST_LIMIT = int(os.getenv("INTERACTIVE_COST_LIMIT", "2400"))
+    # plain jobs costing at most this many member-hours are computed in the request and returned directly, 0 disables
+    INLINE_COST_LIMIT = int(os.getenv("INLINE_COST_LIMIT", "0"))
+
+    # token buckets for recommendation requests, per user and per group: requests per minute and burst size, 0 disables
+    RECOMMENDATION_USER_RATE = int(os.getenv("RECOMMENDATION_USER_RATE", "30"))
+    RECOMMENDATION_USER_BURST = int(os.getenv("RECOMMENDATION_USER_BURST", "10"))
+    RECOMMENDATION_GROUP_RATE = int(os.getenv("RECOMMENDATION_GROUP_RATE", "60"))
+    RECOMMENDATION_GROUP_BURST = int(os.getenv("RECOMMENDATION_GROUP_BURST", "20"))
+    # pending jobs a group may have queued at once, and messages waiting in a lane before it stops taking jobs, 0 disables
+    RECOMMENDATION_IN_FLIGHT_LIMIT = int(os.getenv("RECOMMENDATION_IN_FLIGHT_LIMIT", "20"))
+    RECOMMENDATION_BACKLOG_LIMIT = int(os.getenv("RECOMMENDATION_BACKLOG_LIMIT", "10000"))
+    # pending jobs created longer ago than this, in seconds, no longer count as in flight
+    RECOMMENDATION_IN_FLIGHT_WINDOW = int(os.getenv("RECOMMENDATION_IN_FLIGHT_WINDOW", "3600"))
+    # Retry-After, in seconds, of submissions turned away by either of those
+    RECOMMENDATION_RETRY_AFTER = int(os.getenv("RECOMMENDATION_RETRY_AFTER", "5"))
@@ -0,0 +1,386 @@
+import asyncio
+import functools
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import aio_pika
+import redis.asyncio
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.interval import Interval
+import availability
+import common
+import queries
+import quorum
+import ranking
+import recurrence
+import scheduling
+from common import PermanentError, interval_engine
+
+# jobs in flight on the event loop, each holds at most one database connection
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "32"))
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url):
+    """The same database URL with the asyncio driver of its backend"""
+    url = sa.engine.make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+engine = create_async_engine(async_database_url(common.SQLALCHEMY_DATABASE_URI), pool_size=max(5, WORKER_CONCURRENCY))
+Session = async_sessionmaker(engine, expire_on_commit=False)
+processes = ProcessPoolExecutor(max_workers=common.WORKER_PROCESSES)
+redis_client = redis.asyncio.from_url(common.REDIS_URL) if common.REDIS_URL else None
+
+async def compute(fn, *args):
+    """Run the interval math in the process pool so it never blocks the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(processes, functools.partial(fn, *args))
+
+async def notify_finished(job_id, status="DONE"):
+    if redis_client is None:
+        return
+    try:
+        await redis_client.publish(common.job_channel(job_id), status)
+    except redis.RedisError as e:
+        print(f"Could not announce job {job_id}: {e}")
+
+async def load_availability(session, group_id, start_time, end_time):
+    rows = await session.execute(queries.member_availability(group_id, start_time, end_time))
+    user_ids = (await session.execute(queries.members_with_availability(group_id))).scalars().all()
+    return availability.member_availability(rows, start_time, end_time, user_ids)
+
+async def load_busy_and_unavailable(session, group_id, start_time, end_time):
+    if common.BUSY_SOURCE == "timeline":
+        rows = await session.execute(queries.member_busy(group_id, start_time, end_time))
+        recurring = await session.execute(
+            queries.busy_intervals(group_id, start_time, end_time, common.GROUP_OVERLAP_INDEX, recurring_only=True)
+        )
+        busy = common.timeline_busy(rows, recurring, start_time, end_time)
+    else:
+        rows = await session.execute(queries.busy_intervals(group_id, start_time, end_time, common.GROUP_OVERLAP_INDEX))
+        busy = list(recurrence.expand(rows, start_time, end_time))
+
+    available = await load_availability(session, group_id, start_time, end_time)
+    return busy, availability.common_unavailable(available, start_time, end_time)
+
+async def load_busy_epochs(session, group_id, start_time, end_time):
+    if common.BUSY_SOURCE == "timeline":
+        rows = await session.execute(queries.member_busy_epochs(group_id, start_time, end_time))
+    else:
+        rows = await session.execute(queries.busy_epochs(group_id, start_time, end_time, common.GROUP_OVERLAP_INDEX))
+    recurring = await session.execute(
+        queries.busy_intervals(group_id, start_time, end_time, common.GROUP_OVERLAP_INDEX, recurring_only=True)
+    )
+    available = await load_availability(session, group_id, start_time, end_time)
+
+    others = list(recurrence.expand(recurring, start_time, end_time))
+    others += availability.common_unavailable(available, start_time, end_time)
+    return interval_engine.clip_epochs(interval_engine.epoch_array(rows, others), start_time, end_time)
+
+async def load_busy_intervals(session, group_id, start_time, end_time):
+    """The union of load_busy_and_unavailable in the form the interval engine takes"""
+    if common.EPOCH_BUSY:
+        return await load_busy_epochs(session, group_id, start_time, end_time)
+
+    busy, unavailable = await load_busy_and_unavailable(session, group_id, start_time, end_time)
+    return busy + unavailable
+
+async def load_member_busy(session, group_id, start_time, end_time):
+    members = (await session.execute(queries.group_members(group_id))).scalars().all()
+
+    if common.BUSY_SOURCE == "timeline":
+        blocks = await session.execute(queries.member_busy(group_id, start_time, end_time))
+        recurring = await session.execute(queries.member_busy_events(group_id, start_time, end_time, recurring_only=True))
+        rows = [(user_id, block_start, block_end, None) for user_id, block_start, block_end in blocks] + list(recurring)
+    else:
+        rows = await session.execute(queries.member_busy_events(group_id, start_time, end_time))
+
+    available = await load_availability(session, group_id, start_time, end_time)
+    return members, common.busy_by_member(rows, available, start_time, end_time)
+
+async def _copy_intervals(session, job_id, slots):
+    connection = await (await session.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(
+        "interval",
+        records=[(job_id, start, end) for start, end in slots],
+        columns=["job_id", "start_time", "end_time"]
+    )
+
+async def save_results(session, job_id, slots, cache_key=None, result_format="slots", duration=None, commit=True):
+    """Async counterpart of worker.save_results, False if the job was already DONE"""
+    mode = common.INTERVAL_WRITE_MODE
+    plain = all(len(slot) == 2 for slot in slots)
+
+    if mode == "orm":
+        session.add_all([Interval(**common.interval_row(job_id, slot)) for slot in slots])
+    elif mode == "copy" and plain and engine.dialect.name == "postgresql":
+        await _copy_intervals(session, job_id, slots)
+    elif slots:
+        await session.execute(
+            Interval.__table__.insert(),
+            [common.interval_row(job_id, slot) for slot in slots]
+        )
+
+    done = await session.execute(queries.mark_done(job_id, cache_key, result_format, duration))
+    if done.rowcount == 0:
+        await session.rollback()
+        return False
+
+    if commit:
+        await session.commit()
+    return True
+
+async def serve_cached_result(session, job_id, cache_key):
+    hit = (await session.execute(queries.cached_result(cache_key, job_id))).first()
+    if hit is None:
+        return False
+
+    await session.execute(queries.mark_cached(job_id, cache_key, hit.result_job_id or hit.id))
+    await session.commit()
+    return True
+
+async def run_shard(session, job, start_time, end_time, duration):
+    intervals = await load_busy_intervals(session, job["group_id"], start_time, end_time)
+    await session.commit()
+    free = await compute(interval_engine.find_free, intervals, start_time, end_time)
+    if not await save_results(session, job["job_id"], free, result_format="free", commit=False):
+        return
+
+    remaining = (await session.execute(queries.finish_shard(job["parent_job_id"]))).scalar_one()
+    print(f"Shard {job['job_id']} of job {job['parent_job_id']} DONE, shards left: {remaining}")
+
+    if remaining == 0:
+        parent_job_id = job["parent_job_id"]
+        result, result_format = common.shard_result(await session.execute(queries.shard_free(parent_job_id)), duration)
+        await session.execute(queries.delete_shard_intervals(parent_job_id))
+        await save_results(session, parent_job_id, result, result_format=result_format, duration=duration, commit=False)
+        print(f"Job {parent_job_id} DONE, found {result_format}: {len(result)}")
+    await session.commit()
+
+    if remaining == 0:
+        await notify_finished(job["parent_job_id"])
+
+async def run_job(session, job, start_time, end_time, duration):
+    """Async counterpart of worker.run_job, producing the same rows for the same message"""
+    status = (await session.execute(queries.job_status(job["job_id"]))).scalar()
+    if status is None:
+        raise PermanentError(f"Job {job['job_id']} does not exist")
+    if status == "DONE":
+        print(f"Job {job['job_id']} already DONE, skipping redelivery")
+        return
+
+    if job.get("parent_job_id") is not None:
+        return await run_shard(session, job, start_time, end_time, duration)
+
+    cache_key = None
+    if common.RESULT_CACHE:
+        versions = [list(version) for version in await session.execute(
+            queries.group_versions(job["group_id"], common.GROUP_OVERLAP_INDEX)
+        )]
+        cache_key = common.result_cache_key(job, versions)
+        if await serve_cached_result(session, job["job_id"], cache_key):
+            print(f"Job {job['job_id']} DONE, served from cache")
+            await notify_finished(job["job_id"])
+            return
+
+    result_format = "slots"
+    if common.is_quorum_job(job):
+        members, busy_by_user = await load_member_busy(session, job["group_id"], start_time, end_time)
+        args = (
+            quorum.find_quorum_slots,
+            busy_by_user, len(members), start_time, end_time, duration,
+            quorum.required_attendees(job, len(members)), bool(job.get("include_missing"))
+        )
+    elif ranking.is_ranked_job(job):
+        padding = ranking.buffer(job)
+        busy, unavailable = await load_busy_and_unavailable(
+            session, job["group_id"], start_time - padding, end_time + padding
+        )
+        args = (
+            ranking.find_top_slots,
+            busy, start_time, end_time, duration, job["top_k"],
+            job.get("preferred_hours"), padding, job.get("rank_by", "earliest"), unavailable
+        )
+    else:
+        intervals = await load_busy_intervals(session, job["group_id"], start_time, end_time)
+        if common.RESULT_FORMAT == "windows":
+            args = (interval_engine.find_windows, intervals, start_time, end_time, duration)
+            result_format = "windows"
+        else:
+            args = (interval_engine.find_slots, intervals, start_time, end_time, duration)
+
+    # hand the connection back to the pool while the interval math runs
+    await session.commit()
+    slots = await compute(*args)
+
+    if await save_results(session, job["job_id"], slots, cache_key=cache_key, result_format=result_format, duration=duration):
+        print(f"Job {job['job_id']} DONE, found {result_format}: {len(slots)}")
+        await notify_finished(job["job_id"])
+
+async def record_failure(job, error, attempts, final):
+    try:
+        async with Session() as session:
+            await session.execute(common.failure_update(job, error, attempts, final))
+            await session.commit()
+        if final:
+            for job_id in common.failed_job_ids(job, final):
+                await notify_finished(job_id, "FAILED")
+    except Exception:
+        traceback.print_exc()
+
+async def collect_garbage(max_batches=10):
+    """Async counterpart of worker.collect_garbage"""
+    cutoff = datetime.utcnow() - timedelta(hours=common.JOB_RETENTION_HOURS)
+    jobs = intervals = 0
+
+    async with Session() as session:
+        for _ in range(max_batches):
+            job_ids = (await session.execute(queries.expired_jobs(cutoff, common.JOB_GC_BATCH))).scalars().all()
+            if job_ids:
+                intervals += (await session.execute(queries.delete_job_intervals(job_ids))).rowcount
+                jobs += (await session.execute(queries.delete_shards(job_ids))).rowcount
+                jobs += (await session.execute(queries.delete_jobs(job_ids))).rowcount
+            await session.commit()
+
+            if len(job_ids) < common.JOB_GC_BATCH:
+                break
+
+    if jobs:
+        print(f"Garbage collection reclaimed {jobs} jobs and {intervals} intervals")
+        await record_reclaimed(jobs, intervals)
+    return jobs, intervals
+
+async def record_reclaimed(jobs, intervals):
+    if redis_client is None:
+        return
+    try:
+        await redis_client.hincrby(common.RETENTION_METRICS_KEY, "jobs", jobs)
+        await redis_client.hincrby(common.RETENTION_METRICS_KEY, "intervals", intervals)
+        await redis_client.hset(common.RETENTION_METRICS_KEY, "last_run", datetime.utcnow().isoformat())
+    except redis.RedisError as e:
+        print(f"Could not record reclaimed rows: {e}")
+
+async def garbage_collector():
+    while True:
+        await asyncio.sleep(common.JOB_GC_INTERVAL)
+        try:
+            await collect_garbage()
+        except Exception:
+            traceback.print_exc()
+
+def collector_stopped(task):
+    """Report a garbage collector that died, collection would otherwise stop silently until shutdown"""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        print("Garbage collector stopped, expired jobs are no longer collected")
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+async def settle(channel, message, failure=None):
+    """Ack a delivery, a failed one is first republished to its delayed retry queue or the dead-letter queue"""
+    if failure is not None:
+        queue, headers = common.failure_route(message.routing_key, failure)
+        await channel.default_exchange.publish(
+            aio_pika.Message(message.body, headers=headers, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+            routing_key=queue
+        )
+        print(f"Delivery failed (attempt {headers['x-attempts']}), sent to {queue}")
+
+    await message.ack()
+
+async def process_message(channel, message):
+    job = None
+    failure = None
+    try:
+        job = common.decode_job(message.body)
+        print("Processing job:", job)
+        window = common.job_window(job)
+        async with Session() as session:
+            await run_job(session, job, *window)
+    except Exception as e:
+        traceback.print_exception(type(e), e, e.__traceback__)
+        failure = common.failure_outcome(message.headers, e)
+        if job is not None:
+            await record_failure(job, *failure)
+
+    await settle(channel, message, failure)
+
+async def consume(channel, scheduler, arrived):
+    """Start buffered deliveries in the scheduler's order whenever one of the concurrent slots frees up"""
+    slots = asyncio.Semaphore(WORKER_CONCURRENCY)
+    running = set()
+
+    def finished(task):
+        running.discard(task)
+        slots.release()
+
+    while True:
+        if not scheduler:
+            arrived.clear()
+            await arrived.wait()
+            continue
+
+        # the next delivery is picked only once a slot is free, so deliveries that arrived meanwhile are considered
+        await slots.acquire()
+        message, _, _ = scheduler.pop(1)[0]
+        task = asyncio.create_task(process_message(channel, message))
+        running.add(task)
+        task.add_done_callback(finished)
+
+async def _wait_for_rabbitmq(retries=10, delay=3):
+    for attempt in range(retries):
+        try:
+            connection = await aio_pika.connect_robust(common.RABBITMQ_URL)
+            print("RabbitMQ connected.")
+            return connection
+        except Exception as e:
+            print(f"RabbitMQ connection failed (attempt {attempt + 1}/{retries}): {e}")
+            await asyncio.sleep(delay)
+
+async def main():
+    print("Starting async worker")
+    connection = await _wait_for_rabbitmq()
+    channel = await connection.channel()
+    # per lane, enough for every concurrent slot to be fed from either lane
+    await channel.set_qos(prefetch_count=max(common.WORKER_PREFETCH, WORKER_CONCURRENCY))
+
+    await channel.declare_queue(scheduling.DEAD_LETTER_QUEUE, durable=True)
+
+    scheduler = scheduling.FairScheduler()
+    arrived = asyncio.Event()
+
+    async def on_message(lane, message):
+        scheduler.push(lane, channel, message, message, message.body)
+        arrived.set()
+
+    for lane in scheduling.LANES:
+        queue = await channel.declare_queue(lane, durable=True)
+        for delay_ms in common.retry_delays():
+            await channel.declare_queue(
+                scheduling.retry_queue(lane, delay_ms),
+                durable=True,
+                arguments=scheduling.retry_queue_arguments(lane, delay_ms)
+            )
+        await queue.consume(functools.partial(on_message, lane))
+
+    collector = None
+    if common.JOB_RETENTION_HOURS > 0:
+        # kept referenced, the event loop only holds tasks weakly
+        collector = asyncio.create_task(garbage_collector())
+        collector.add_done_callback(collector_stopped)
+
+    print("Worker started")
+    try:
+        await consume(channel, scheduler, arrived)
+    finally:
+        if collector is not None:
+            collector.cancel()
+            await asyncio.gather(collector, return_exceptions=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from intervals import free_intervals, merge_intervals
+
+WEEK = timedelta(weeks=1)
+
+
+def weekly_occurrences(start_time, end_time, window_start, window_end):
+    """Occurrences of a weekly template that overlap the window, without walking the weeks before it"""
+    week = max(0, (window_start - end_time) // WEEK + 1)
+    occurrence_start = start_time + week * WEEK
+
+    while occurrence_start < window_end:
+        yield occurrence_start, occurrence_start + (end_time - start_time)
+        occurrence_start += WEEK
+
+def member_availability(rows, window_start, window_end, user_ids=()):
+    """Merged availability windows inside the window of every member with availability set.
+
+    rows are the members' availability rows that can reach the window, user_ids every member with
+    any availability row at all. Members whose rows all fall outside the window get no windows, they
+    are unavailable for all of it rather than free.
+    """
+    windows = {user_id: [] for user_id in user_ids}
+    for user_id, start_time, end_time, recurrence in rows:
+        if recurrence == "weekly":
+            occurrences = weekly_occurrences(start_time, end_time, window_start, window_end)
+        else:
+            occurrences = [(start_time, end_time)]
+
+        windows.setdefault(user_id, []).extend(
+            (max(start, window_start), min(end, window_end))
+            for start, end in occurrences
+            if start < window_end and end > window_start
+        )
+
+    return {user_id: merge_intervals(member_windows) for user_id, member_windows in windows.items()}
+
+def intersect(first, second):
+    """Linear merge of two sorted lists of disjoint intervals"""
+    common = []
+    i = j = 0
+
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            common.append((start, end))
+
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+
+    return common
+
+def unavailable_intervals(windows, window_start, window_end):
+    """The rest of the window, treated as busy so every engine only finds slots inside the availability"""
+    return free_intervals(windows, window_start, window_end)
+
+def common_unavailable(availability_by_user, window_start, window_end):
+    """Busy intervals outside the time every member with availability set is available"""
+    common = None
+    for windows in availability_by_user.values():
+        common = windows if common is None else intersect(common, windows)
+
+    if common is None:
+        return []
+    return unavailable_intervals(common, window_start, window_end)
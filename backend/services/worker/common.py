@@ -0,0 +1,188 @@
+# configuration and helpers shared by worker.py and async_worker.py, importing this module opens no connections
+import hashlib
+import itertools
+import json
+import os
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from models.job import Job
+from intervals import fitting_windows, generate_slots, merge_intervals, merge_timelines
+import availability
+import recurrence
+import scheduling
+
+SQLALCHEMY_DATABASE_URI = os.getenv("CALENDAR_DATABASE_URL")
+RABBITMQ_URL = os.getenv("RABBITMQ_URL")
+INTERVAL_ENGINE = os.getenv("INTERVAL_ENGINE", "python")
+INTERVAL_WRITE_MODE = os.getenv("INTERVAL_WRITE_MODE", "bulk")
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "1"))
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", os.cpu_count() or 1))
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "1"))
+WORKER_BATCH_WAIT = float(os.getenv("WORKER_BATCH_WAIT", "0.5"))
+# per lane; the fair scheduler can only interleave groups among deliveries it has been sent
+WORKER_PREFETCH = int(os.getenv("WORKER_PREFETCH", max(WORKER_THREADS, WORKER_BATCH_SIZE, 4)))
+RESULT_CACHE = os.getenv("RESULT_CACHE", "true").lower() == "true"
+RESULT_FORMAT = os.getenv("RESULT_FORMAT", "windows")
+GROUP_OVERLAP_INDEX = os.getenv("GROUP_OVERLAP_INDEX", "true").lower() == "true"
+BUSY_SOURCE = os.getenv("BUSY_SOURCE", "events")
+WORKER_MAX_RETRIES = int(os.getenv("WORKER_MAX_RETRIES", "3"))
+# seconds before the first retry, doubled for every further attempt
+WORKER_RETRY_DELAY = float(os.getenv("WORKER_RETRY_DELAY", "5"))
+# finished jobs and their intervals are deleted this long after completion, 0 keeps them forever
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+# seconds between garbage collection runs and jobs deleted per transaction
+JOB_GC_INTERVAL = float(os.getenv("JOB_GC_INTERVAL", "600"))
+JOB_GC_BATCH = int(os.getenv("JOB_GC_BATCH", "100"))
+# finished jobs are announced on this Redis for requests waiting on them, unset disables it
+REDIS_URL = os.getenv("REDIS_URL")
+RETENTION_METRICS_KEY = "metrics:retention"
+
+if INTERVAL_ENGINE == "numpy":
+    import intervals_numpy as interval_engine
+else:
+    import intervals as interval_engine
+
+# an engine working on epoch arrays gets the busy set of plain jobs loaded as epochs straight from the database
+EPOCH_BUSY = hasattr(interval_engine, "epoch_array")
+
+def job_channel(job_id):
+    return f"job:{job_id}:done"
+
+def clip_intervals(intervals, start_time, end_time):
+    return [
+        (max(interval_start, start_time), min(interval_end, end_time))
+        for interval_start, interval_end in intervals
+        if interval_start < end_time and interval_end > start_time
+    ]
+
+def clip_busy(busy, start_time, end_time):
+    """clip_intervals of a busy set in the form the interval engine takes"""
+    if EPOCH_BUSY:
+        return interval_engine.clip_epochs(busy, start_time, end_time)
+    return clip_intervals(busy, start_time, end_time)
+
+def timeline_busy(rows, recurring, start_time, end_time):
+    """Merge the members' timeline blocks, ordered by user and start, with the recurring event rows expanded inside the window"""
+    timelines = [
+        clip_intervals([(block_start, block_end) for _, block_start, block_end in blocks], start_time, end_time)
+        for _, blocks in itertools.groupby(rows, key=lambda row: row.user_id)
+    ]
+
+    # the timelines only hold single events, recurring ones are expanded inside the window on top
+    timelines.append(merge_intervals(list(recurrence.expand(recurring, start_time, end_time))))
+
+    return merge_timelines(timelines)
+
+def busy_by_member(rows, available, start_time, end_time):
+    """Each member's busy intervals inside the window from (user_id, start, end, recurrence) rows and their availability"""
+    busy_by_user = {}
+    for user_id, busy_start, busy_end, rule in rows:
+        busy_by_user.setdefault(user_id, []).extend(
+            recurrence.expand([(busy_start, busy_end, rule)], start_time, end_time)
+        )
+
+    for user_id, windows in available.items():
+        busy_by_user.setdefault(user_id, []).extend(
+            availability.unavailable_intervals(windows, start_time, end_time)
+        )
+
+    return busy_by_user
+
+def interval_row(job_id, slot):
+    row = {"job_id": job_id, "start_time": slot[0], "end_time": slot[1], "available": None, "missing": None}
+    if len(slot) > 2:
+        row["available"] = slot[2]
+        row["missing"] = json.dumps(slot[3]) if slot[3] is not None else None
+    return row
+
+def result_cache_key(job, versions):
+    """Hash of the job parameters and the calendar version of every group that affects its busy time"""
+    params = {key: value for key, value in job.items() if key != "job_id"}
+
+    payload = json.dumps([params, versions], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class PermanentError(Exception):
+    """A delivery that can never succeed, it is dead-lettered without retries"""
+
+def parse_window(job):
+    duration = timedelta(
+                    hours=job["duration"].get("hours", 0),
+                    minutes=job["duration"].get("minutes", 0)
+                )
+    start_time = datetime.fromisoformat(job["start_time"])
+    end_time = datetime.fromisoformat(job["end_time"])
+
+    return start_time, end_time, duration
+
+def decode_job(body):
+    try:
+        job = json.loads(body)
+        job["job_id"], job["group_id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise PermanentError(f"Invalid job payload: {e!r}") from e
+    return job
+
+def job_window(job):
+    try:
+        window = parse_window(job)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise PermanentError(f"Invalid job window: {e!r}") from e
+
+    if window[2] <= timedelta(0):
+        raise PermanentError("duration must be positive")
+    # the calendar service submits windows the way event times are stored, without an offset
+    if window[0].tzinfo is not None or window[1].tzinfo is not None:
+        raise PermanentError("job window must not have a UTC offset")
+    return window
+
+def is_quorum_job(job):
+    return job.get("min_attendees") is not None or job.get("min_fraction") is not None
+
+def shard_result(free, duration):
+    """(result, result_format) of a sharded job from the free intervals of all its shards"""
+    # free intervals touching at a shard boundary merge back into one, so no boundary slot is lost
+    merged = merge_intervals([(start, end) for start, end in free])
+    if RESULT_FORMAT == "windows":
+        return fitting_windows(merged, duration), "windows"
+    return generate_slots(merged, duration), "slots"
+
+def retry_delays():
+    return [int(WORKER_RETRY_DELAY * 1000) * 2 ** attempt for attempt in range(WORKER_MAX_RETRIES)]
+
+def failed_job_ids(job, final):
+    """The job, and on a final failure also the parent of a shard"""
+    if final and job.get("parent_job_id") is not None:
+        return [job["job_id"], job["parent_job_id"]]
+    return [job["job_id"]]
+
+def failure_update(job, error, attempts, final):
+    """Store the error on the job, a final failure marks it and the parent of a shard FAILED"""
+    values = {"error": error, "attempts": attempts}
+    if final:
+        values["status"] = "FAILED"
+        values["completed_at"] = datetime.utcnow()
+
+    return (
+        sa.update(Job.__table__)
+        .where(Job.__table__.c.id.in_(failed_job_ids(job, final)), Job.__table__.c.status != "DONE")
+        .values(**values)
+    )
+
+def failure_outcome(headers, error):
+    """(attempts, error, final) of a failed delivery: a delayed retry, or the dead-letter queue when final"""
+    attempts = (headers or {}).get("x-attempts", 0) + 1
+    final = isinstance(error, PermanentError) or attempts > WORKER_MAX_RETRIES
+    return attempts, repr(error), final
+
+def failure_route(lane, failure):
+    """(queue, headers) a failed delivery from the lane is republished with"""
+    attempts, error, final = failure
+    if final:
+        queue = scheduling.DEAD_LETTER_QUEUE
+    else:
+        queue = scheduling.retry_queue(lane, retry_delays()[attempts - 1])
+
+    return queue, {"x-attempts": attempts, "x-error": error[:1000], "x-lane": lane}
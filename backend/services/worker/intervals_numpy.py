@@ -0,0 +1,147 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch(value):
+    """Microseconds since 1970-01-01 of a naive datetime, the unit of epoch arrays"""
+    return (value - _EPOCH) // _MICROSECOND
+
+def epoch_array(epoch_rows, intervals=()):
+    """(n, 2) int64 array of (start, end) epoch microsecond rows followed by the naive datetime intervals.
+
+    find_slots, find_windows and find_free take it in place of a list of pairs, so busy time the
+    database already returns as epochs never becomes datetimes; the sort and merge run on it directly.
+    """
+    rows = np.fromiter(itertools.chain.from_iterable(epoch_rows), dtype=np.int64).reshape(-1, 2)
+    if not intervals:
+        return rows
+    return np.concatenate((rows, np.column_stack(_to_arrays(intervals, None))))
+
+def clip_epochs(array, start_time, end_time):
+    """The rows of an epoch array overlapping the window, clipped to it"""
+    start, end = to_epoch(start_time), to_epoch(end_time)
+    array = array[(array[:, 0] < end) & (array[:, 1] > start)]
+    return np.clip(array, start, end)
+
+def _to_epoch(values, tzinfo):
+    # timedelta arithmetic is several times faster than numpy's own datetime parsing of a list
+    epoch = _EPOCH if tzinfo is None else _EPOCH_UTC
+    return np.array([(value - epoch) // _MICROSECOND for value in values], dtype=np.int64)
+
+def _from_epoch(values, tzinfo):
+    if tzinfo is None:
+        return values.astype("datetime64[us]").tolist()
+    return [(_EPOCH_UTC + timedelta(microseconds=int(value))).astimezone(tzinfo) for value in values]
+
+def _to_arrays(intervals, tzinfo):
+    if isinstance(intervals, np.ndarray):
+        return intervals[:, 0], intervals[:, 1]
+    return (
+        _to_epoch([start for start, _ in intervals], tzinfo),
+        _to_epoch([end for _, end in intervals], tzinfo),
+    )
+
+def _to_intervals(starts, ends, tzinfo):
+    return list(zip(_from_epoch(starts, tzinfo), _from_epoch(ends, tzinfo)))
+
+def _merge(starts, ends):
+    if starts.size == 0:
+        return starts, ends
+
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    ends = np.maximum.accumulate(ends[order])
+
+    # a new block starts wherever an interval begins after everything before it has ended
+    breaks = np.flatnonzero(starts[1:] > ends[:-1]) + 1
+    first = np.concatenate(([0], breaks))
+    last = np.concatenate((breaks - 1, [starts.size - 1]))
+
+    return starts[first], ends[last]
+
+def _free(starts, ends, start_time, end_time):
+    if starts.size == 0:
+        return np.array([start_time], dtype=np.int64), np.array([end_time], dtype=np.int64)
+
+    free_starts = np.concatenate(([start_time], ends))
+    free_ends = np.concatenate((starts, [end_time]))
+
+    keep = np.ones(free_starts.size, dtype=bool)
+    keep[0] = start_time < starts[0]
+    keep[-1] = ends[-1] < end_time
+
+    return free_starts[keep], free_ends[keep]
+
+def _slots(free_starts, free_ends, duration):
+    counts = np.maximum((free_ends - free_starts) // duration, 0)
+    first_slot = np.cumsum(counts) - counts
+
+    offsets = np.arange(counts.sum()) - np.repeat(first_slot, counts)
+    slot_starts = np.repeat(free_starts, counts) + offsets * duration
+
+    return slot_starts, slot_starts + duration
+
+def _tzinfo(intervals, default=None):
+    return intervals[0][0].tzinfo if intervals else default
+
+def merge_intervals(intervals):
+    tzinfo = _tzinfo(intervals)
+    return _to_intervals(*_merge(*_to_arrays(intervals, tzinfo)), tzinfo)
+
+def free_intervals(intervals, start_time, end_time):
+    tzinfo = start_time.tzinfo
+    window = _to_epoch([start_time, end_time], tzinfo)
+    free = _free(*_to_arrays(intervals, tzinfo), window[0], window[1])
+    return _to_intervals(*free, tzinfo)
+
+def fitting_windows(free, duration):
+    """Free intervals long enough to hold at least one slot"""
+    tzinfo = _tzinfo(free)
+    starts, ends = _to_arrays(free, tzinfo)
+    fits = ends - starts >= duration // _MICROSECOND
+    return _to_intervals(starts[fits], ends[fits], tzinfo)
+
+def generate_slots(free, duration):
+    """Split every free interval into back-to-back slots of the given duration"""
+    if duration <= timedelta(0):
+        raise ValueError("duration must be positive")
+
+    tzinfo = _tzinfo(free)
+    slots = _slots(*_to_arrays(free, tzinfo), duration // _MICROSECOND)
+    return _to_intervals(*slots, tzinfo)
+
+def find_slots(intervals, start_time, end_time, duration):
+    """Busy intervals in, back-to-back free slots of the given duration out, without leaving int64 arrays"""
+    if duration <= timedelta(0):
+        raise ValueError("duration must be positive")
+
+    tzinfo = start_time.tzinfo
+    window = _to_epoch([start_time, end_time], tzinfo)
+
+    busy = _merge(*_to_arrays(intervals, tzinfo))
+    free = _free(*busy, window[0], window[1])
+    slots = _slots(*free, duration // _MICROSECOND)
+
+    return _to_intervals(*slots, tzinfo)
+
+def find_free(intervals, start_time, end_time):
+    """Busy intervals in, every free interval of the window out"""
+    tzinfo = start_time.tzinfo
+    window = _to_epoch([start_time, end_time], tzinfo)
+    return _to_intervals(*_free(*_merge(*_to_arrays(intervals, tzinfo)), window[0], window[1]), tzinfo)
+
+def find_windows(intervals, start_time, end_time, duration):
+    """Busy intervals in, free windows that fit at least one slot of the given duration out"""
+    tzinfo = start_time.tzinfo
+    window = _to_epoch([start_time, end_time], tzinfo)
+
+    starts, ends = _free(*_merge(*_to_arrays(intervals, tzinfo)), window[0], window[1])
+    fits = ends - starts >= duration // _MICROSECOND
+
+    return _to_intervals(starts[fits], ends[fits], tzinfo)
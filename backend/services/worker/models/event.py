@@ -12,6 +12,8 @@ class Event(base):
     description = db.Column(db.String(1024))
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
+    recurrence = db.Column(db.String(255))
+    series_end = db.Column(db.DateTime)
     creation_date = db.Column(db.DateTime)
     last_update = db.Column(db.DateTime)
 
@@ -23,6 +25,8 @@ class Event(base):
             "description": self.description,
             "start_time": self.start_time,
             "end_time": self.end_time,
+            "recurrence": self.recurrence,
+            "series_end": self.series_end,
             "creation_date": self.creation_date,
             "last_update": self.last_update,
         }
\ No newline at end of file
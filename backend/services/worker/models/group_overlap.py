@@ -0,0 +1,18 @@
+import sqlalchemy as db
+from sqlalchemy.ext.declarative import declarative_base
+
+base = declarative_base()
+
+class GroupOverlap(base):
+    __tablename__ = "group_overlap"
+
+    group_id = db.Column(db.Integer, primary_key=True)
+    other_group_id = db.Column(db.Integer, primary_key=True)
+    shared_members = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "group_id": self.group_id,
+            "other_group_id": self.other_group_id,
+            "shared_members": self.shared_members,
+        }
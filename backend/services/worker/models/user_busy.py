@@ -0,0 +1,22 @@
+import sqlalchemy as db
+from sqlalchemy.ext.declarative import declarative_base
+
+base = declarative_base()
+
+class UserBusy(base):
+    __tablename__ = "user_busy"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(50), nullable=False)
+    event_id = db.Column(db.Integer)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "event_id": self.event_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+        }
@@ -0,0 +1,271 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from models.availability import Availability
+from models.event import Event
+from models.group import Group
+from models.group_overlap import GroupOverlap
+from models.group_user import GroupUser
+from models.interval import Interval
+from models.job import Job
+from models.user_busy import UserBusy
+
+
+def co_member_groups(group_id):
+    """Select the ids of every group that shares at least one member with the given group, from group_user"""
+    member = orm.aliased(GroupUser)
+    co_member = orm.aliased(GroupUser)
+
+    return (
+        sa.select(co_member.group_id)
+        .join(member, member.user_id == co_member.user_id)
+        .where(member.group_id == group_id)
+        .distinct()
+    )
+
+
+def affecting_groups(group_id, use_index=True):
+    """Select the ids of every group that shares at least one member with the given group"""
+    if not use_index:
+        return co_member_groups(group_id)
+
+    return (
+        sa.select(GroupOverlap.other_group_id.label("group_id"))
+        .where(GroupOverlap.group_id == group_id)
+    )
+
+
+def reaches_window(start_time, end_time, recurring_only=False):
+    """Single events overlapping the window and recurring events whose series is still running in it"""
+    recurring = sa.and_(
+        Event.recurrence.isnot(None),
+        sa.or_(Event.series_end.is_(None), Event.series_end > start_time)
+    )
+
+    return sa.and_(
+        Event.start_time < end_time,
+        recurring if recurring_only else sa.or_(Event.end_time > start_time, recurring)
+    )
+
+
+def busy_intervals(group_id, start_time, end_time, use_index=True, recurring_only=False):
+    """Select (start_time, end_time, recurrence) of every event that keeps a member of the group busy inside the window"""
+    groups = affecting_groups(group_id, use_index).subquery()
+
+    return (
+        sa.select(Event.start_time, Event.end_time, Event.recurrence)
+        .join(groups, Event.group_id == groups.c.group_id)
+        .where(reaches_window(start_time, end_time, recurring_only))
+    )
+
+
+def epoch_us(column):
+    """Microseconds since 1970-01-01 of a timestamp column, computed by the database (SQLite keeps whole seconds)"""
+    return sa.cast(sa.extract("epoch", column) * 1000000, sa.BigInteger)
+
+
+def busy_epochs(group_id, start_time, end_time, use_index=True):
+    """Select (start, end) as epoch microseconds of every single event keeping a member of the group busy inside the window"""
+    groups = affecting_groups(group_id, use_index).subquery()
+
+    return (
+        sa.select(epoch_us(Event.start_time), epoch_us(Event.end_time))
+        .join(groups, Event.group_id == groups.c.group_id)
+        .where(
+            Event.recurrence.is_(None),
+            Event.start_time < end_time,
+            Event.end_time > start_time
+        )
+    )
+
+
+def group_members(group_id):
+    return sa.select(GroupUser.user_id).where(GroupUser.group_id == group_id)
+
+
+def member_busy_events(group_id, start_time, end_time, recurring_only=False):
+    """Select (user_id, start_time, end_time, recurrence) of every event keeping a member of the group busy inside the window"""
+    member = orm.aliased(GroupUser)
+    membership = orm.aliased(GroupUser)
+
+    return (
+        sa.select(member.user_id, Event.start_time, Event.end_time, Event.recurrence)
+        .join(membership, membership.user_id == member.user_id)
+        .join(Event, Event.group_id == membership.group_id)
+        .where(
+            member.group_id == group_id,
+            reaches_window(start_time, end_time, recurring_only)
+        )
+    )
+
+
+def member_busy(group_id, start_time, end_time):
+    """Select (user_id, start_time, end_time) of the group members' busy blocks inside the window, one per event"""
+    return (
+        sa.select(UserBusy.user_id, UserBusy.start_time, UserBusy.end_time)
+        .join(GroupUser, GroupUser.user_id == UserBusy.user_id)
+        .where(
+            GroupUser.group_id == group_id,
+            UserBusy.start_time < end_time,
+            UserBusy.end_time > start_time
+        )
+        .order_by(UserBusy.user_id, UserBusy.start_time)
+    )
+
+
+def member_busy_epochs(group_id, start_time, end_time):
+    """Select (start, end) as epoch microseconds of the group members' busy blocks inside the window"""
+    return (
+        sa.select(epoch_us(UserBusy.start_time), epoch_us(UserBusy.end_time))
+        .join(GroupUser, GroupUser.user_id == UserBusy.user_id)
+        .where(
+            GroupUser.group_id == group_id,
+            UserBusy.start_time < end_time,
+            UserBusy.end_time > start_time
+        )
+    )
+
+
+def member_availability(group_id, start_time, end_time):
+    """Select (user_id, start_time, end_time, recurrence) of the members' availability rows that can reach the window"""
+    return (
+        sa.select(GroupUser.user_id, Availability.start_time, Availability.end_time, Availability.recurrence)
+        .join(GroupUser, GroupUser.id == Availability.user_id)
+        .where(
+            GroupUser.group_id == group_id,
+            Availability.start_time < end_time,
+            sa.or_(Availability.end_time > start_time, Availability.recurrence == "weekly")
+        )
+    )
+
+
+def members_with_availability(group_id):
+    """Select the user ids of the group members that have any availability row, whatever its time"""
+    return (
+        sa.select(GroupUser.user_id)
+        .where(
+            GroupUser.group_id == group_id,
+            sa.exists().where(Availability.user_id == GroupUser.id)
+        )
+    )
+
+
+def job_status(job_id):
+    return sa.select(Job.status).where(Job.id == job_id)
+
+
+def mark_done(job_id, cache_key, result_format, duration):
+    """Flip the job to DONE with its result metadata, matches no row when another delivery already did"""
+    slot_seconds = int(duration.total_seconds()) if duration is not None else None
+
+    return (
+        sa.update(Job.__table__)
+        .where(Job.__table__.c.id == job_id, Job.__table__.c.status != "DONE")
+        .values(
+            status="DONE",
+            cache_key=cache_key,
+            result_format=result_format,
+            slot_duration=slot_seconds,
+            slot_step=slot_seconds,
+            completed_at=datetime.utcnow()
+        )
+    )
+
+
+def mark_cached(job_id, cache_key, result_job_id):
+    return (
+        sa.update(Job.__table__)
+        .where(Job.__table__.c.id == job_id)
+        .values(status="DONE", cache_key=cache_key, result_job_id=result_job_id, completed_at=datetime.utcnow())
+    )
+
+
+def finish_shard(parent_job_id):
+    """Count a finished shard off its parent, returning the shards still pending"""
+    return (
+        sa.update(Job.__table__)
+        .where(Job.__table__.c.id == parent_job_id)
+        .values(shards_pending=Job.__table__.c.shards_pending - 1)
+        .returning(Job.__table__.c.shards_pending)
+    )
+
+
+def delete_shard_intervals(parent_job_id):
+    return sa.delete(Interval.__table__).where(Interval.__table__.c.job_id.in_(shard_jobs(parent_job_id)))
+
+
+def shard_jobs(parent_job_id):
+    return sa.select(Job.id).where(Job.parent_job_id == parent_job_id)
+
+
+def shard_free(parent_job_id):
+    """Select (start_time, end_time) of the free intervals stored by every shard of the job"""
+    return (
+        sa.select(Interval.start_time, Interval.end_time)
+        .where(Interval.job_id.in_(shard_jobs(parent_job_id)))
+        .order_by(Interval.start_time)
+    )
+
+
+def expired_jobs(cutoff, limit):
+    """Select a batch of top-level jobs finished (or abandoned) before the cutoff whose intervals no other job reuses
+
+    Rows another collector already holds are skipped rather than waited for.
+    """
+    reusing = orm.aliased(Job)
+
+    return (
+        sa.select(Job.id)
+        .where(
+            Job.parent_job_id.is_(None),
+            sa.or_(
+                Job.completed_at < cutoff,
+                # rows from before created_at existed have neither timestamp and count as expired
+                sa.and_(Job.completed_at.is_(None), sa.or_(Job.created_at < cutoff, Job.created_at.is_(None)))
+            ),
+            ~sa.exists().where(reusing.result_job_id == Job.id)
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def delete_job_intervals(job_ids):
+    """Delete the intervals of the jobs and of their shards"""
+    shards = sa.select(Job.id).where(Job.parent_job_id.in_(job_ids))
+    return (
+        sa.delete(Interval.__table__)
+        .where(sa.or_(Interval.__table__.c.job_id.in_(job_ids), Interval.__table__.c.job_id.in_(shards)))
+    )
+
+
+def delete_shards(job_ids):
+    return sa.delete(Job.__table__).where(Job.__table__.c.parent_job_id.in_(job_ids))
+
+
+def delete_jobs(job_ids):
+    return sa.delete(Job.__table__).where(Job.__table__.c.id.in_(job_ids))
+
+
+def group_versions(group_id, use_index=True):
+    """Select (id, calendar_version) of every group whose events affect the given group"""
+    return (
+        sa.select(Group.id, Group.calendar_version)
+        .where(Group.id.in_(affecting_groups(group_id, use_index)))
+        .order_by(Group.id)
+    )
+
+
+def cached_result(cache_key, job_id):
+    """Select a finished job computed from the same parameters and calendar versions"""
+    return (
+        sa.select(Job.id, Job.result_job_id)
+        .where(
+            Job.cache_key == cache_key,
+            Job.status == "DONE",
+            Job.id != job_id
+        )
+        .limit(1)
+    )
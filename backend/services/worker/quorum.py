@@ -0,0 +1,91 @@
+import math
+from collections import defaultdict
+
+from intervals import merge_intervals
+
+
+def required_attendees(job, member_count):
+    if job.get("min_attendees") is not None:
+        return int(job["min_attendees"])
+    return math.ceil(float(job["min_fraction"]) * member_count)
+
+def quorum_segments(busy_by_user, member_count, start_time, end_time, min_attendees):
+    """Sweep line over every member's busy boundaries.
+
+    Returns the (start, end, available, busy users) segments of the window where at least
+    min_attendees members are free; the busy set is constant inside a segment.
+    """
+    changes = defaultdict(list)
+    for user_id, intervals in busy_by_user.items():
+        # a member's own overlapping events must only count them once
+        for start, end in merge_intervals(list(intervals)):
+            changes[start].append((user_id, True))
+            changes[end].append((user_id, False))
+
+    busy = set()
+    segments = []
+    cursor = start_time
+
+    for time in sorted(set(changes) | {end_time}):
+        if time > cursor:
+            segment_end = min(time, end_time)
+            available = member_count - len(busy)
+            if available >= min_attendees:
+                segments.append((cursor, segment_end, available, frozenset(busy)))
+            cursor = segment_end
+
+        if time >= end_time:
+            break
+
+        for user_id, starts in changes[time]:
+            if starts:
+                busy.add(user_id)
+            else:
+                busy.discard(user_id)
+
+    return segments
+
+def _runs(segments):
+    run = []
+    for segment in segments:
+        if run and segment[0] != run[-1][1]:
+            yield run
+            run = []
+        run.append(segment)
+
+    if run:
+        yield run
+
+def quorum_slots(segments, member_count, duration, min_attendees, include_missing=False):
+    """Back-to-back slots inside runs of adjacent segments, kept when enough members are free for the whole slot"""
+    slots = []
+
+    for run in _runs(segments):
+        first = 0
+        slot_start = run[0][0]
+
+        while slot_start + duration <= run[-1][1]:
+            slot_end = slot_start + duration
+            while run[first][1] <= slot_start:
+                first += 1
+
+            missing = set()
+            index = first
+            while index < len(run) and run[index][0] < slot_end:
+                missing |= run[index][3]
+                index += 1
+
+            available = member_count - len(missing)
+            if available >= min_attendees:
+                slots.append((slot_start, slot_end, available, sorted(missing) if include_missing else None))
+
+            slot_start = slot_end
+
+    return slots
+
+def find_quorum_slots(busy_by_user, member_count, start_time, end_time, duration, min_attendees, include_missing=False):
+    if duration.total_seconds() <= 0:
+        raise ValueError("duration must be positive")
+
+    segments = quorum_segments(busy_by_user, member_count, start_time, end_time, min_attendees)
+    return quorum_slots(segments, member_count, duration, min_attendees, include_missing)
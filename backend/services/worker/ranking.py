@@ -0,0 +1,94 @@
+import heapq
+from collections import Counter
+from datetime import timedelta
+
+from intervals import fitting_windows, free_intervals, merge_intervals
+
+RANK_BY = ("earliest", "least_fragmented")
+
+
+def is_ranked_job(job):
+    return job.get("top_k") is not None
+
+def buffer(job):
+    return timedelta(minutes=job.get("buffer_minutes", 0))
+
+def pad_intervals(intervals, padding, start_time, end_time):
+    """Busy intervals widened by the buffer on both sides, clipped to the window"""
+    padded = []
+    for interval_start, interval_end in intervals:
+        interval_start, interval_end = interval_start - padding, interval_end + padding
+        if interval_start < end_time and interval_end > start_time:
+            padded.append((max(interval_start, start_time), min(interval_end, end_time)))
+
+    return padded
+
+def day_fragments(windows):
+    """How many usable free windows each calendar day is split into, a window spanning midnight counts on both days"""
+    fragments = Counter()
+    for start, end in windows:
+        day, last_day = start.date(), (end - timedelta(microseconds=1)).date()
+        while day <= last_day:
+            fragments[day] += 1
+            day += timedelta(days=1)
+
+    return fragments
+
+def is_preferred(slot_start, slot_end, preferred_hours):
+    if preferred_hours is None:
+        return True
+
+    first_hour, last_hour = preferred_hours
+    midnight = slot_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(hours=first_hour) <= slot_start and slot_end <= midnight + timedelta(hours=last_hour)
+
+def _candidates(windows, duration):
+    for window_start, window_end in windows:
+        slot_start = window_start
+        while slot_start + duration <= window_end:
+            yield slot_start, slot_start + duration
+            slot_start += duration
+
+def find_top_slots(intervals, start_time, end_time, duration, top_k, preferred_hours=None,
+                   padding=timedelta(0), rank_by="earliest", unavailable=()):
+    """The top_k best slots in rank order.
+
+    Only the busy intervals of events get the buffer, unavailable ones (time outside the members'
+    availability) are busy exactly as they are.
+
+    A slot scores (outside preferred hours, free windows on its day, start); lower is better.
+    Candidates come in chronological order, so once the heap's worst slot beats the best score
+    any later start could reach, the scan stops.
+    """
+    if duration <= timedelta(0):
+        raise ValueError("duration must be positive")
+
+    busy = merge_intervals(
+        pad_intervals(intervals, padding, start_time, end_time) + pad_intervals(unavailable, timedelta(0), start_time, end_time)
+    )
+    windows = fitting_windows(free_intervals(busy, start_time, end_time), duration)
+    fragments = day_fragments(windows) if rank_by == "least_fragmented" else None
+
+    # a day holding any candidate has at least one free window
+    best_fragments = 1 if fragments is not None else 0
+
+    # max-heap of the k best so far: scores are negated so the worst kept slot sits on top
+    heap = []
+    for slot_start, slot_end in _candidates(windows, duration):
+        offset = (slot_start - start_time).total_seconds()
+        if len(heap) == top_k and (0, best_fragments, offset) >= tuple(-value for value in heap[0][:3]):
+            break
+
+        score = (
+            0 if is_preferred(slot_start, slot_end, preferred_hours) else 1,
+            fragments[slot_start.date()] if fragments is not None else 0,
+            offset,
+        )
+        entry = (-score[0], -score[1], -score[2], slot_start, slot_end)
+
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    return [(slot_start, slot_end) for *_, slot_start, slot_end in sorted(heap, reverse=True)]
@@ -0,0 +1,162 @@
+import functools
+import math
+from datetime import datetime, timedelta
+
+FREQUENCIES = {"DAILY": timedelta(days=1), "WEEKLY": timedelta(weeks=1)}
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _parse_until(value):
+    value = value.rstrip("Z")
+    try:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")
+    except ValueError:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+
+@functools.lru_cache(maxsize=1024)
+def parse_rule(rule):
+    """(period, count, until) of an RRULE subset: FREQ=DAILY|WEEKLY with optional INTERVAL and COUNT or UNTIL"""
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+
+    parts = {}
+    for part in rule.split(";"):
+        key, separator, value = part.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid recurrence part: {part!r}")
+        parts[key.strip().upper()] = value.strip()
+
+    unsupported = set(parts) - {"FREQ", "INTERVAL", "COUNT", "UNTIL"}
+    if unsupported:
+        raise ValueError(f"Unsupported recurrence parts: {', '.join(sorted(unsupported))}")
+
+    if parts.get("FREQ", "").upper() not in FREQUENCIES:
+        raise ValueError("FREQ must be DAILY or WEEKLY")
+
+    if "COUNT" in parts and "UNTIL" in parts:
+        raise ValueError("COUNT and UNTIL cannot both be set")
+
+    interval = int(parts.get("INTERVAL", 1))
+    count = int(parts["COUNT"]) if "COUNT" in parts else None
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("INTERVAL and COUNT must be positive")
+
+    until = _parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+    return FREQUENCIES[parts["FREQ"].upper()] * interval, count, until
+
+def occurrence_count(start_time, rule):
+    """Number of occurrences of the series, None when it never ends"""
+    period, count, until = parse_rule(rule)
+    if until is None:
+        return count
+    return max(0, (until - start_time) // period + 1)
+
+def series_end(start_time, end_time, rule):
+    """End of the last occurrence, None when the series never ends"""
+    count = occurrence_count(start_time, rule)
+    if count is None:
+        return None
+    return end_time + (count - 1) * parse_rule(rule)[0]
+
+def _first_index(start_time, end_time, period, after):
+    """First occurrence that ends after the given time"""
+    return max(0, (after - end_time) // period + 1)
+
+def _last_index(start_time, period, count, before):
+    """Last occurrence that starts before the given time, None if there is no bound at all"""
+    last = None if before is None else -((start_time - before) // period) - 1
+    if count is not None:
+        last = count - 1 if last is None else min(last, count - 1)
+    return last
+
+def occurrences(start_time, end_time, rule, window_start, window_end):
+    """Occurrences overlapping the window, jumping straight to the first one instead of walking the series"""
+    period = parse_rule(rule)[0]
+    index = _first_index(start_time, end_time, period, window_start)
+    last = _last_index(start_time, period, occurrence_count(start_time, rule), window_end)
+
+    while index <= last:
+        occurrence_start = start_time + index * period
+        yield occurrence_start, occurrence_start + (end_time - start_time)
+        index += 1
+
+def expand(events, window_start, window_end):
+    """(start, end) of every occurrence of the (start, end, recurrence) events inside the window, clipped to it"""
+    for start_time, end_time, rule in events:
+        if rule:
+            spans = occurrences(start_time, end_time, rule, window_start, window_end)
+        else:
+            spans = [(start_time, end_time)]
+
+        for span_start, span_end in spans:
+            if span_start < window_end and span_end > window_start:
+                yield max(span_start, window_start), min(span_end, window_end)
+
+def _overlaps_interval(start_time, end_time, rule, other_start, other_end):
+    period = parse_rule(rule)[0]
+    first = _first_index(start_time, end_time, period, other_start)
+    last = _last_index(start_time, period, occurrence_count(start_time, rule), other_end)
+    return last is None or first <= last
+
+def _overlaps_series(first, second):
+    """Whether two recurring events ever overlap, without walking either series.
+
+    Start offsets between occurrences of the two series only take values congruent to the
+    difference of their first starts modulo gcd(P1, P2), so when none of those values falls in
+    the overlapping range the series never meet. Otherwise the pattern repeats every
+    lcm(P1, P2): one period of occurrences of the longer-period series is checked where the
+    other series is fully active, plus the few at either edge of it.
+    """
+    if parse_rule(first[2])[0] < parse_rule(second[2])[0]:
+        first, second = second, first
+
+    (start_1, end_1, rule_1), (start_2, end_2, rule_2) = first, second
+    period_1, period_2 = parse_rule(rule_1)[0], parse_rule(rule_2)[0]
+    length_1, length_2 = end_1 - start_1, end_2 - start_2
+
+    gcd = math.gcd(period_1 // _MICROSECOND, period_2 // _MICROSECOND)
+    residue = ((start_2 - start_1) // _MICROSECOND) % gcd
+    if residue >= length_1 // _MICROSECOND and gcd - residue >= length_2 // _MICROSECOND:
+        return False
+
+    count_1, count_2 = occurrence_count(start_1, rule_1), occurrence_count(start_2, rule_2)
+    if count_1 is None and count_2 is None:
+        return True
+    if count_1 == 0 or count_2 == 0:
+        return False
+
+    # occurrences of the first series that can meet the second at all, a bounded range since one series ends
+    low = _first_index(start_1, end_1, period_1, start_2)
+    high = _last_index(start_1, period_1, count_1, series_end(start_2, end_2, rule_2))
+
+    # where every occurrence of the second series that could be met exists, the answer repeats every lcm
+    interior_low = max(low, -((start_1 - start_2 - length_2) // period_1))
+    interior_high = high
+    if count_2 is not None:
+        last_start_2 = start_2 + (count_2 - 1) * period_2
+        interior_high = min(high, (last_start_2 + period_2 - length_1 - start_1) // period_1)
+
+    indices = list(range(low, min(interior_low, high + 1)))
+    if interior_low <= interior_high:
+        repeat = period_2 // _MICROSECOND // gcd
+        indices += range(interior_low, min(interior_high, interior_low + repeat - 1) + 1)
+        indices += range(interior_high + 1, high + 1)
+    else:
+        indices += range(interior_low, high + 1)
+
+    return any(
+        _overlaps_interval(start_2, end_2, rule_2, start_1 + index * period_1, start_1 + index * period_1 + length_1)
+        for index in indices
+    )
+
+def overlaps(first, second):
+    """Whether two (start, end, recurrence) events overlap anywhere, recurrence may be None"""
+    (start_1, end_1, rule_1), (start_2, end_2, rule_2) = first, second
+
+    if rule_1 and rule_2:
+        return _overlaps_series(first, second)
+    if rule_1:
+        return _overlaps_interval(start_1, end_1, rule_1, start_2, end_2)
+    if rule_2:
+        return _overlaps_interval(start_2, end_2, rule_2, start_1, end_1)
+    return start_1 < end_2 and end_1 > start_2
@@ -0,0 +1,67 @@
+import json
+from collections import OrderedDict, deque
+
+INTERACTIVE_QUEUE = "suggestions.interactive"
+BULK_QUEUE = "suggestions"
+
+# highest priority first
+LANES = (INTERACTIVE_QUEUE, BULK_QUEUE)
+
+DEAD_LETTER_QUEUE = "suggestions.dead"
+
+
+def retry_queue(lane, delay_ms):
+    """Holding queue whose messages expire back into the lane after delay_ms, one per backoff step"""
+    return f"{lane}.retry.{delay_ms}"
+
+def retry_queue_arguments(lane, delay_ms):
+    return {
+        "x-message-ttl": delay_ms,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": lane,
+    }
+
+def group_of(body):
+    try:
+        return json.loads(body).get("group_id")
+    except (ValueError, AttributeError):
+        return None
+
+class FairScheduler:
+    """Deliveries buffered per lane and group.
+
+    Work is handed out from the highest-priority lane that has any, round-robin across the
+    groups inside it, so one group with many queued jobs cannot hold up everyone else.
+    """
+
+    def __init__(self, lanes=LANES):
+        self.lanes = {lane: OrderedDict() for lane in lanes}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, lane, channel, method, properties, body):
+        """pika message callback, bind the lane with functools.partial"""
+        groups = self.lanes[lane]
+        groups.setdefault(group_of(body), deque()).append((method, properties, body))
+        self.size += 1
+
+    def pop(self, limit=1):
+        """Up to `limit` deliveries of the next group in turn"""
+        for groups in self.lanes.values():
+            if not groups:
+                continue
+
+            group_id, deliveries = next(iter(groups.items()))
+            taken = [deliveries.popleft() for _ in range(min(limit, len(deliveries)))]
+
+            if deliveries:
+                groups.move_to_end(group_id)
+            else:
+                del groups[group_id]
+
+            self.size -= len(taken)
+            return taken
+
+        return []
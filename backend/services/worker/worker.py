@@ -1,121 +1,455 @@
-import os
+import functools
+import io
+import itertools
+import traceback
 from socket import socket
 import pika
-import json
+import redis
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timedelta, datetime
 
 from models.group import Group
-from models.group_user import GroupUser
-from models.event import Event
 from models.interval import Interval
-from models.job import Job
+from common import (
+    SQLALCHEMY_DATABASE_URI, RABBITMQ_URL, INTERVAL_WRITE_MODE, WORKER_THREADS, WORKER_PROCESSES,
+    WORKER_BATCH_SIZE, WORKER_BATCH_WAIT, WORKER_PREFETCH, RESULT_CACHE, RESULT_FORMAT, GROUP_OVERLAP_INDEX,
+    BUSY_SOURCE, JOB_RETENTION_HOURS, JOB_GC_INTERVAL, JOB_GC_BATCH, REDIS_URL, RETENTION_METRICS_KEY,
+    EPOCH_BUSY, PermanentError, interval_engine, job_channel, clip_intervals, clip_busy, timeline_busy, busy_by_member, interval_row,
+    result_cache_key, decode_job, job_window, is_quorum_job, shard_result, retry_delays, failed_job_ids,
+    failure_update, failure_outcome, failure_route
+)
+import availability
+import queries
+import quorum
+import ranking
+import recurrence
+import scheduling
 from sqlalchemy import orm
 from sqlalchemy.ext.declarative import declarative_base
 import sqlalchemy as sa
 
-SQLALCHEMY_DATABASE_URI = os.getenv("CALENDAR_DATABASE_URL")
-RABBITMQ_URL = os.getenv("RABBITMQ_URL")
-
 base = declarative_base()
-engine = sa.create_engine(SQLALCHEMY_DATABASE_URI)
+engine = sa.create_engine(SQLALCHEMY_DATABASE_URI, pool_size=max(5, WORKER_THREADS))
 base.metadata.bind = engine
 session = orm.scoped_session(orm.sessionmaker(bind=engine))
+redis_client = redis.from_url(REDIS_URL) if REDIS_URL else None
 
-def merge_intervals(intervals):
-    if not intervals:
-        return []
+def notify_finished(job_id, status="DONE"):
+    """Wake requests waiting on the job, best effort since they fall back to the database on timeout"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.publish(job_channel(job_id), status)
+    except redis.RedisError as e:
+        print(f"Could not announce job {job_id}: {e}")
 
-    intervals.sort(key=lambda x: x[0])
+def record_reclaimed(jobs, intervals):
+    """Add the rows deleted by a collection run to the counters the calendar service reports"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.hincrby(RETENTION_METRICS_KEY, "jobs", jobs)
+        redis_client.hincrby(RETENTION_METRICS_KEY, "intervals", intervals)
+        redis_client.hset(RETENTION_METRICS_KEY, "last_run", datetime.utcnow().isoformat())
+    except redis.RedisError as e:
+        print(f"Could not record reclaimed rows: {e}")
 
-    merged = []
-    current_start, current_end = intervals[0]
+def load_busy_timeline(group_id, start_time, end_time):
+    """Busy time from the members' timeline blocks, read in one ordered range scan"""
+    rows = session.execute(queries.member_busy(group_id, start_time, end_time))
+    recurring = session.execute(
+        queries.busy_intervals(group_id, start_time, end_time, GROUP_OVERLAP_INDEX, recurring_only=True)
+    )
+    return timeline_busy(rows, recurring, start_time, end_time)
 
-    for start, end in intervals[1:]:
-        if start <= current_end:
-            current_end = max(current_end, end)
-        else:
-            merged.append((current_start, current_end))
-            current_start, current_end = start, end
+def load_availability(group_id, start_time, end_time):
+    rows = session.execute(queries.member_availability(group_id, start_time, end_time))
+    user_ids = session.execute(queries.members_with_availability(group_id)).scalars().all()
+    return availability.member_availability(rows, start_time, end_time, user_ids)
 
-    merged.append((current_start, current_end))
-    return merged
-        
-def free_intervals(intervals, start_time, end_time):
-    if not intervals:
-        return [(start_time, end_time)]
-    free = []
+def load_busy_and_unavailable(group_id, start_time, end_time):
+    """(busy intervals of the members' events, time outside their common availability) inside the window"""
+    if BUSY_SOURCE == "timeline":
+        busy = load_busy_timeline(group_id, start_time, end_time)
+    else:
+        rows = session.execute(queries.busy_intervals(group_id, start_time, end_time, GROUP_OVERLAP_INDEX))
+        busy = list(recurrence.expand(rows, start_time, end_time))
 
-    if start_time < intervals[0][0]:
-        free.append((start_time, intervals[0][0]))
+    available = load_availability(group_id, start_time, end_time)
+    return busy, availability.common_unavailable(available, start_time, end_time)
 
-    for i in range(len(intervals) - 1):
-        free.append((intervals[i][1], intervals[i + 1][0]))
+def load_busy_epochs(group_id, start_time, end_time):
+    """The union of load_busy_and_unavailable as an epoch array, single events and blocks come as epochs from the database"""
+    if BUSY_SOURCE == "timeline":
+        rows = session.execute(queries.member_busy_epochs(group_id, start_time, end_time))
+    else:
+        rows = session.execute(queries.busy_epochs(group_id, start_time, end_time, GROUP_OVERLAP_INDEX))
+    recurring = session.execute(
+        queries.busy_intervals(group_id, start_time, end_time, GROUP_OVERLAP_INDEX, recurring_only=True)
+    )
+    available = load_availability(group_id, start_time, end_time)
 
-    if intervals[-1][1] < end_time:
-        free.append((intervals[-1][1], end_time))
+    # occurrences of recurring events and unavailable time are few, only they are converted here
+    others = list(recurrence.expand(recurring, start_time, end_time))
+    others += availability.common_unavailable(available, start_time, end_time)
+    return interval_engine.clip_epochs(interval_engine.epoch_array(rows, others), start_time, end_time)
 
-    return free
+def load_busy_intervals(group_id, start_time, end_time, combined=False):
+    """load_busy_and_unavailable, or with combined their union in the form the interval engine takes"""
+    if combined and EPOCH_BUSY:
+        return load_busy_epochs(group_id, start_time, end_time)
 
-def process_intervals(ch, method, properties, body):
-    job = json.loads(body)
-    print("Processing job:", job)
+    busy, unavailable = load_busy_and_unavailable(group_id, start_time, end_time)
+    # free time is intersected with the members' availability by adding its complement to the busy set
+    return busy + unavailable if combined else (busy, unavailable)
 
-    group_id = job["group_id"]
-    duration = timedelta(
-                    hours=job["duration"].get("hours", 0),
-                    minutes=job["duration"].get("minutes", 0)
-                )
+def load_member_busy(group_id, start_time, end_time):
+    """Member ids of the group and each member's own busy intervals inside the window"""
+    members = session.execute(queries.group_members(group_id)).scalars().all()
 
-    try:
-        start_time = datetime.fromisoformat(job["start_time"])
-        end_time = datetime.fromisoformat(job["end_time"])
-    except:
-        print("Invalid datetime")
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+    if BUSY_SOURCE == "timeline":
+        blocks = session.execute(queries.member_busy(group_id, start_time, end_time))
+        rows = itertools.chain(
+            ((user_id, block_start, block_end, None) for user_id, block_start, block_end in blocks),
+            session.execute(queries.member_busy_events(group_id, start_time, end_time, recurring_only=True))
+        )
+    else:
+        rows = session.execute(queries.member_busy_events(group_id, start_time, end_time))
+
+    return members, busy_by_member(rows, load_availability(group_id, start_time, end_time), start_time, end_time)
+
+def _copy_intervals(job_id, slots):
+    buffer = io.StringIO()
+    for start, end in slots:
+        buffer.write(f"{job_id}\t{start.isoformat()}\t{end.isoformat()}\n")
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert("COPY interval (job_id, start_time, end_time) FROM STDIN", buffer)
+
+def save_results(job_id, slots, mode=None, cache_key=None, result_format="slots", duration=None, commit=True):
+    """Persist the job's slots (or free windows) and flip it to DONE in a single transaction, False if it already was"""
+    mode = mode or INTERVAL_WRITE_MODE
+    plain = all(len(slot) == 2 for slot in slots)
+
+    if mode == "orm":
+        for slot in slots:
+            session.add(Interval(**interval_row(job_id, slot)))
+    elif mode == "copy" and plain and engine.dialect.name == "postgresql":
+        _copy_intervals(job_id, slots)
+    elif slots:
+        session.execute(
+            Interval.__table__.insert(),
+            [interval_row(job_id, slot) for slot in slots]
+        )
+
+    done = session.execute(queries.mark_done(job_id, cache_key, result_format, duration))
+    if done.rowcount == 0:
+        # another delivery of the same job got there first, its rows are already stored
+        session.rollback()
+        return False
+
+    if commit:
+        session.commit()
+    return True
+
+def calendar_versions(group_id):
+    return [list(version) for version in session.execute(queries.group_versions(group_id, GROUP_OVERLAP_INDEX))]
+
+def serve_cached_result(job_id, cache_key):
+    """Point the job at an identical finished job's intervals, returns False on a cache miss"""
+    hit = session.execute(queries.cached_result(cache_key, job_id)).first()
+    if hit is None:
+        return False
+
+    session.execute(queries.mark_cached(job_id, cache_key, hit.result_job_id or hit.id))
+    session.commit()
+    return True
+
+def _run_inline(fn, *args):
+    return fn(*args)
+
+def reduce_shards(parent_job_id, duration):
+    """Reduce step: stitch the shards' free intervals across shard boundaries into the parent job's result"""
+    result, result_format = shard_result(session.execute(queries.shard_free(parent_job_id)), duration)
+
+    session.execute(queries.delete_shard_intervals(parent_job_id))
+    save_results(parent_job_id, result, result_format=result_format, duration=duration, commit=False)
+
+    print(f"Job {parent_job_id} DONE, found {result_format}: {len(result)}")
+
+def run_shard(job, start_time, end_time, duration, compute, load):
+    """Map step: store the shard's free intervals, the shard that finishes last reduces them"""
+    intervals = load(job["group_id"], start_time, end_time, combined=True)
+    free = compute(interval_engine.find_free, intervals, start_time, end_time)
+    if not save_results(job["job_id"], free, result_format="free", commit=False):
         return
-  
-    intervals = []
-
-    users = session.query(GroupUser).filter(GroupUser.group_id == group_id).all()
-    for user in users:
-        groups = session.query(GroupUser).filter(GroupUser.user_id == user.user_id).all()   
-        for group in groups:
-            events = session.query(Event).filter(Event.group_id == group.group_id).all()
-            for event in events:
-                event_start_time = event.start_time
-                event_end_time = event.end_time
-                if event_end_time <= start_time or event_start_time >= end_time:
-                    continue
-                intervals.append((max(event_start_time, start_time), min(event_end_time, end_time)))
-
-    intervals = merge_intervals(intervals)
-    free = free_intervals(intervals, start_time, end_time)
-
-    intervals_cnt = 0
-    for start, end in free:
-        while start + duration <= end:
-            intervals_cnt += 1
-            job_result = Interval(
-                job_id=job["job_id"],
-                start_time=start,
-                end_time=start + duration
 
-            )
-            session.add(job_result)
-            
-            start += duration
-
-    job_record = session.get(Job, job["job_id"])
-    if job_record is not None:
-        job_record.status = "DONE"
-        session.add(job_record)
-    
+    # the row lock taken by the update makes exactly one shard see the count reach zero
+    remaining = session.execute(queries.finish_shard(job["parent_job_id"])).scalar_one()
+
+    print(f"Shard {job['job_id']} of job {job['parent_job_id']} DONE, shards left: {remaining}")
+
+    if remaining == 0:
+        reduce_shards(job["parent_job_id"], duration)
     session.commit()
 
-    print(f"Job {job_record.id} DONE, found intervals: {intervals_cnt}")
+    if remaining == 0:
+        notify_finished(job["parent_job_id"])
+
+def run_job(job, start_time, end_time, duration, compute=None, load=None, cache_key=None):
+    compute = compute or _run_inline
+    load = load or load_busy_intervals
+
+    status = session.execute(queries.job_status(job["job_id"])).scalar()
+    if status is None:
+        raise PermanentError(f"Job {job['job_id']} does not exist")
+    if status == "DONE":
+        print(f"Job {job['job_id']} already DONE, skipping redelivery")
+        return
+
+    if job.get("parent_job_id") is not None:
+        return run_shard(job, start_time, end_time, duration, compute, load)
+
+    # the key is taken before loading events so a concurrent calendar change can only make it stale, never wrong
+    if cache_key is None and RESULT_CACHE:
+        cache_key = result_cache_key(job, calendar_versions(job["group_id"]))
+    if cache_key and serve_cached_result(job["job_id"], cache_key):
+        print(f"Job {job['job_id']} DONE, served from cache")
+        notify_finished(job["job_id"])
+        return
+
+    result_format = "slots"
+    if is_quorum_job(job):
+        members, busy_by_user = load_member_busy(job["group_id"], start_time, end_time)
+        slots = compute(
+            quorum.find_quorum_slots,
+            busy_by_user, len(members), start_time, end_time, duration,
+            quorum.required_attendees(job, len(members)), bool(job.get("include_missing"))
+        )
+    elif ranking.is_ranked_job(job):
+        padding = ranking.buffer(job)
+        busy, unavailable = load(job["group_id"], start_time - padding, end_time + padding)
+        slots = compute(
+            ranking.find_top_slots,
+            busy, start_time, end_time, duration, job["top_k"],
+            job.get("preferred_hours"), padding, job.get("rank_by", "earliest"), unavailable
+        )
+    elif RESULT_FORMAT == "windows":
+        # slots are expanded lazily by the calendar service when results are read
+        intervals = load(job["group_id"], start_time, end_time, combined=True)
+        slots = compute(interval_engine.find_windows, intervals, start_time, end_time, duration)
+        result_format = "windows"
+    else:
+        intervals = load(job["group_id"], start_time, end_time, combined=True)
+        slots = compute(interval_engine.find_slots, intervals, start_time, end_time, duration)
+
+    if save_results(job["job_id"], slots, cache_key=cache_key, result_format=result_format, duration=duration):
+        print(f"Job {job['job_id']} DONE, found {result_format}: {len(slots)}")
+        notify_finished(job["job_id"])
+
+def record_failure(job, error, attempts, final):
+    try:
+        session.execute(failure_update(job, error, attempts, final))
+        session.commit()
+        if final:
+            for job_id in failed_job_ids(job, final):
+                notify_finished(job_id, "FAILED")
+    except Exception:
+        traceback.print_exc()
+        session.rollback()
+
+def handle_failure(job, properties, error):
+    """Decide between a delayed retry and the dead-letter queue, returns the failure to settle the delivery with"""
+    traceback.print_exception(type(error), error, error.__traceback__)
+    session.rollback()
+
+    failure = failure_outcome(properties.headers if properties else None, error)
+    if job is not None:
+        record_failure(job, *failure)
+    return failure
+
+def run_delivery(properties, body, compute=None):
+    """Run one delivery, returns None on success or the failure to settle it with"""
+    job = None
+    try:
+        job = decode_job(body)
+        print("Processing job:", job)
+        run_job(job, *job_window(job), compute=compute)
+    except Exception as e:
+        return handle_failure(job, properties, e)
+
+def settle(ch, method, body, failure=None):
+    """Ack a delivery, a failed one is first republished to its delayed retry queue or the dead-letter queue"""
+    if failure is not None:
+        queue, headers = failure_route(method.routing_key, failure)
+        ch.basic_publish(
+            exchange="",
+            routing_key=queue,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2, headers=headers)
+        )
+        print(f"Delivery failed (attempt {headers['x-attempts']}), sent to {queue}")
 
     ch.basic_ack(delivery_tag=method.delivery_tag)
 
+def process_intervals(ch, method, properties, body):
+    settle(ch, method, body, run_delivery(properties, body))
+
+def collect_garbage(max_batches=10):
+    """Delete expired jobs with their shards and intervals, one short transaction per batch so no lock is held long"""
+    cutoff = datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)
+    jobs = intervals = 0
+
+    for _ in range(max_batches):
+        job_ids = session.execute(queries.expired_jobs(cutoff, JOB_GC_BATCH)).scalars().all()
+        if job_ids:
+            intervals += session.execute(queries.delete_job_intervals(job_ids)).rowcount
+            jobs += session.execute(queries.delete_shards(job_ids)).rowcount
+            jobs += session.execute(queries.delete_jobs(job_ids)).rowcount
+        session.commit()
+
+        if len(job_ids) < JOB_GC_BATCH:
+            break
+
+    if jobs:
+        print(f"Garbage collection reclaimed {jobs} jobs and {intervals} intervals")
+        record_reclaimed(jobs, intervals)
+    return jobs, intervals
+
+def schedule_garbage_collection(connection):
+    """Run collect_garbage every JOB_GC_INTERVAL seconds on the connection's thread, between deliveries"""
+    def run():
+        try:
+            collect_garbage()
+        except Exception:
+            traceback.print_exc()
+            session.rollback()
+        connection.call_later(JOB_GC_INTERVAL, run)
+
+    connection.call_later(JOB_GC_INTERVAL, run)
+
+def shared_loader(group_id, start_time, end_time):
+    """Loader that reads the group's busy sets once for the whole window and clips them per job"""
+    loaded = {}
+
+    def load(_, job_start_time, job_end_time, combined=False):
+        if combined not in loaded:
+            loaded[combined] = load_busy_intervals(group_id, start_time, end_time, combined)
+        if combined:
+            return clip_busy(loaded[combined], job_start_time, job_end_time)
+        return tuple(clip_intervals(intervals, job_start_time, job_end_time) for intervals in loaded[combined])
+
+    return load
+
+def process_batch(ch, deliveries):
+    """Run a batch of deliveries, loading the busy set once per group for the union of their windows"""
+    groups = {}
+    for method, properties, body in deliveries:
+        job = None
+        try:
+            job = decode_job(body)
+            print("Processing job:", job)
+            window = job_window(job)
+        except PermanentError as e:
+            settle(ch, method, body, handle_failure(job, properties, e))
+            continue
+
+        groups.setdefault(job["group_id"], []).append((method, properties, body, job, window))
+
+    for group_id, jobs in groups.items():
+        # ranked jobs also look at events up to their buffer outside the window
+        load = shared_loader(
+            group_id,
+            min(window[0] - ranking.buffer(job) for *_, job, window in jobs),
+            max(window[1] + ranking.buffer(job) for *_, job, window in jobs)
+        )
+
+        # every key of the batch is taken from one snapshot of the versions, read before any job loads the
+        # shared busy set, so a key never pairs newer versions with older busy data
+        versions = None
+        if RESULT_CACHE and any(job.get("parent_job_id") is None for *_, job, _ in jobs):
+            try:
+                versions = calendar_versions(group_id)
+            except Exception as e:
+                # the jobs still run, their results just are not cached
+                print(f"Could not read calendar versions of group {group_id}: {e!r}")
+
+        for method, properties, body, job, window in jobs:
+            failure = None
+            try:
+                cache_key = None
+                if versions is not None and job.get("parent_job_id") is None:
+                    cache_key = result_cache_key(job, versions)
+
+                run_job(job, *window, load=load, cache_key=cache_key)
+            except Exception as e:
+                failure = handle_failure(job, properties, e)
+
+            settle(ch, method, body, failure)
+
+def concurrent_consumer(connection):
+    """Message callback that runs jobs on a thread pool (DB) and a process pool (interval math)"""
+    threads = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+    processes = ProcessPoolExecutor(max_workers=WORKER_PROCESSES)
+
+    def compute(fn, *args):
+        return processes.submit(fn, *args).result()
+
+    def handle(ch, method, properties, body):
+        try:
+            failure = run_delivery(properties, body, compute=compute)
+        finally:
+            session.remove()
+
+        # pika channels are not thread safe, acks and republishes must happen on the connection's I/O thread
+        connection.add_callback_threadsafe(functools.partial(finish, functools.partial(settle, ch, method, body, failure)))
+
+    # only touched from the connection's thread
+    in_flight = 0
+
+    def finish(reply):
+        nonlocal in_flight
+        in_flight -= 1
+        reply()
+
+    def on_message(ch, method, properties, body):
+        nonlocal in_flight
+        in_flight += 1
+        threads.submit(handle, ch, method, properties, body)
+
+    def has_capacity():
+        return in_flight < WORKER_THREADS
+
+    return on_message, has_capacity
+
+def consume(connection, channel, scheduler):
+    """Pull loop: buffer deliveries from every lane and run them in the scheduler's order"""
+    if WORKER_THREADS > 1:
+        on_message, has_capacity = concurrent_consumer(connection)
+        limit = 1
+    else:
+        on_message, has_capacity = process_intervals, lambda: True
+        limit = WORKER_BATCH_SIZE
+
+    def run(deliveries):
+        if limit > 1:
+            process_batch(channel, deliveries)
+        else:
+            on_message(channel, *deliveries[0])
+
+    while True:
+        # block until a delivery or a finished job's ack arrives when there is nothing to start
+        connection.process_data_events(time_limit=0 if scheduler and has_capacity() else None)
+
+        if limit > 1 and 0 < len(scheduler) < limit:
+            # give a batch a moment to fill up
+            connection.process_data_events(time_limit=WORKER_BATCH_WAIT)
+
+        # one group's turn per pass, so deliveries that arrived meanwhile are considered next
+        if scheduler and has_capacity():
+            run(scheduler.pop(limit))
+
 def _wait_for_rabbitmq(retries=10, delay=3):
     import time
     for attempt in range(retries):
@@ -134,16 +468,29 @@ def main():
     print("Starting worker")
     connection = _wait_for_rabbitmq()
     channel = connection.channel()
-    channel.queue_declare(queue="suggestions", durable=True)
-    channel.basic_qos(prefetch_count=1)
+    channel.basic_qos(prefetch_count=WORKER_PREFETCH)
 
-    channel.basic_consume(
-        queue="suggestions",
-        on_message_callback=process_intervals
-    )
+    channel.queue_declare(queue=scheduling.DEAD_LETTER_QUEUE, durable=True)
+
+    scheduler = scheduling.FairScheduler()
+    for queue in scheduling.LANES:
+        channel.queue_declare(queue=queue, durable=True)
+        for delay_ms in retry_delays():
+            channel.queue_declare(
+                queue=scheduling.retry_queue(queue, delay_ms),
+                durable=True,
+                arguments=scheduling.retry_queue_arguments(queue, delay_ms)
+            )
+        channel.basic_consume(
+            queue=queue,
+            on_message_callback=functools.partial(scheduler.push, queue)
+        )
+
+    if JOB_RETENTION_HOURS > 0:
+        schedule_garbage_collection(connection)
 
     print("Worker started")
-    channel.start_consuming()
+    consume(connection, channel, scheduler)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,16 @@
+import os
+import random
+import sys
+
 import pytest
 import requests
 import time
 
+# the worker's modules are plain top-level modules, the offline tests import them directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "worker"))
+# and the calendar's pure helpers through its app package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "calendar"))
+
 KEYCLOAK_URL = "http://127.0.0.1:8080/"
 KEYCLOAK_REALM = "calendar-realm"
 KEYCLOAK_CLIENT = "calendar-client"
@@ -28,4 +37,16 @@ def auth_headers(access_token):
     return {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
-    }
\ No newline at end of file
+    }
+
+
+@pytest.fixture
+def compare_randomized():
+    """Check actual(*case) == expected(*case) for cases drawn by generate(rng) from a seeded generator"""
+    def compare(generate, actual, expected, seed, cases=200):
+        rng = random.Random(seed)
+        for index in range(cases):
+            case = generate(rng)
+            assert actual(*case) == expected(*case), f"random case {index} of seed {seed}: {case!r}"
+
+    return compare
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import intervals
+from availability import common_unavailable, intersect, member_availability, weekly_occurrences
+
+STEP = timedelta(minutes=30)
+WINDOW_START = datetime(2026, 1, 1)
+
+
+def random_windows(rng):
+    windows = []
+    for _ in range(rng.randint(0, 10)):
+        start = WINDOW_START + rng.randrange(96) * STEP
+        windows.append((start, start + rng.randint(1, 8) * STEP))
+    return intervals.merge_intervals(windows)
+
+def coverage(windows):
+    """Whether each step of the test window is inside one of the windows"""
+    return [
+        any(start <= WINDOW_START + step * STEP < end for start, end in windows)
+        for step in range(110)
+    ]
+
+def intersection(first, second):
+    common = intersect(first, second)
+    return common == intervals.merge_intervals(list(common)), coverage(common)
+
+def brute_force_intersection(first, second):
+    return True, [in_first and in_second for in_first, in_second in zip(coverage(first), coverage(second))]
+
+def test_intersect_matches_brute_force(compare_randomized):
+    compare_randomized(
+        lambda rng: (random_windows(rng), random_windows(rng)),
+        intersection,
+        brute_force_intersection,
+        seed=5,
+        cases=300
+    )
+
+def test_weekly_template_only_expands_inside_the_window():
+    start, end = datetime(2020, 1, 6, 9), datetime(2020, 1, 6, 17)
+
+    occurrences = list(weekly_occurrences(start, end, datetime(2026, 1, 1), datetime(2026, 1, 15)))
+
+    assert occurrences == [
+        (datetime(2026, 1, 5, 9), datetime(2026, 1, 5, 17)),
+        (datetime(2026, 1, 12, 9), datetime(2026, 1, 12, 17)),
+    ]
+
+def test_slots_only_fall_where_every_member_is_available():
+    window_start, window_end = datetime(2026, 1, 5, 0), datetime(2026, 1, 6, 0)
+    rows = [
+        ("alice", datetime(2025, 12, 29, 9), datetime(2025, 12, 29, 17), "weekly"),
+        ("bob", datetime(2026, 1, 5, 13), datetime(2026, 1, 5, 20), None),
+    ]
+
+    busy = common_unavailable(member_availability(rows, window_start, window_end), window_start, window_end)
+
+    assert intervals.find_slots(busy, window_start, window_end, timedelta(hours=2)) == [
+        (datetime(2026, 1, 5, 13), datetime(2026, 1, 5, 15)),
+        (datetime(2026, 1, 5, 15), datetime(2026, 1, 5, 17)),
+    ]
+
+def test_member_with_availability_outside_the_window_is_unavailable():
+    window_start, window_end = datetime(2026, 1, 5, 0), datetime(2026, 1, 6, 0)
+    rows = [("bob", datetime(2026, 1, 5, 13), datetime(2026, 1, 5, 20), None)]
+
+    available = member_availability(rows, window_start, window_end, ["alice", "bob"])
+
+    assert available == {"alice": [], "bob": [(datetime(2026, 1, 5, 13), datetime(2026, 1, 5, 20))]}
+    assert common_unavailable(available, window_start, window_end) == [(window_start, window_end)]
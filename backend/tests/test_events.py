@@ -136,4 +136,31 @@ def test_concurent_events(auth_headers):
             )
             assert remove_resp.status_code == 200
             remove_data = remove_resp.json()
-            assert remove_data["message"] == "Event deleted successfully"
\ No newline at end of file
+            assert remove_data["message"] == "Event deleted successfully"
+
+def test_import_events(auth_headers):
+    base = datetime.utcnow() + timedelta(days=30)
+
+    import_resp = requests.post(
+        f"{CALENDAR_API}/events/group/{GROUP_ID}/import",
+        json=[
+            {"title": "Imported", "start_time": base.isoformat(), "end_time": (base + timedelta(hours=1)).isoformat()},
+            {"title": "Clashing", "start_time": (base + timedelta(minutes=30)).isoformat(), "end_time": (base + timedelta(hours=2)).isoformat()},
+            {"title": "Missing times"},
+        ],
+        headers=auth_headers,
+    )
+
+    assert import_resp.status_code == 200
+    import_data = import_resp.json()
+    assert import_data["imported"] == 1
+    assert import_data["rejected"] == 2
+    assert [result["status"] for result in import_data["results"]] == ["created", "rejected", "rejected"]
+    assert import_data["results"][1]["error"] == "Event time overlaps with event 0 of the import"
+
+    remove_resp = requests.delete(
+        f"{CALENDAR_API}/events/group/{GROUP_ID}",
+        json={"event_id": import_data["results"][0]["id"]},
+        headers=auth_headers,
+    )
+    assert remove_resp.status_code == 200
@@ -0,0 +1,93 @@
+import functools
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import intervals
+
+ENGINES = ["intervals_numpy"]
+WINDOW_START = datetime(2026, 1, 1, 8, 0)
+
+
+def random_calendar(rng, tzinfo=None):
+    start_time = WINDOW_START.replace(tzinfo=tzinfo)
+    end_time = start_time + timedelta(minutes=rng.randint(0, 3000))
+
+    busy = []
+    for _ in range(rng.randint(0, 40)):
+        event_start = start_time + timedelta(minutes=rng.randint(-120, 3100))
+        event_end = event_start + timedelta(minutes=rng.randint(1, 300))
+        if event_end <= start_time or event_start >= end_time:
+            continue
+        busy.append((max(event_start, start_time), min(event_end, end_time)))
+
+    return busy, start_time, end_time, timedelta(minutes=rng.choice([1, 15, 60, 600]))
+
+def results(engine, busy, start_time, end_time, duration):
+    merged = engine.merge_intervals(list(busy))
+    free = engine.free_intervals(merged, start_time, end_time)
+
+    return (
+        merged,
+        free,
+        engine.generate_slots(free, duration),
+        engine.find_slots(list(busy), start_time, end_time, duration),
+        engine.find_windows(list(busy), start_time, end_time, duration),
+        engine.find_free(list(busy), start_time, end_time),
+    )
+
+def epoch_results(engine, busy, start_time, end_time, duration):
+    # half the busy set arrives as epoch rows, the way the worker loads events, the rest as datetimes
+    rows = [(engine.to_epoch(start), engine.to_epoch(end)) for start, end in busy[::2]]
+    array = engine.clip_epochs(engine.epoch_array(rows, busy[1::2]), start_time, end_time)
+
+    return (
+        engine.find_slots(array, start_time, end_time, duration),
+        engine.find_windows(array, start_time, end_time, duration),
+        engine.find_free(array, start_time, end_time),
+    )
+
+def reference_results(busy, start_time, end_time, duration):
+    return (
+        intervals.find_slots(list(busy), start_time, end_time, duration),
+        intervals.find_windows(list(busy), start_time, end_time, duration),
+        intervals.find_free(list(busy), start_time, end_time),
+    )
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    return pytest.importorskip(request.param)
+
+@pytest.mark.parametrize("tzinfo", [None, timezone.utc])
+def test_engine_matches_reference(engine, tzinfo, compare_randomized):
+    compare_randomized(
+        lambda rng: random_calendar(rng, tzinfo),
+        functools.partial(results, engine),
+        functools.partial(results, intervals),
+        seed=42,
+        cases=500
+    )
+
+def test_epoch_input_matches_reference(engine, compare_randomized):
+    if not hasattr(engine, "epoch_array"):
+        pytest.skip(f"{engine.__name__} only takes datetimes")
+
+    compare_randomized(random_calendar, functools.partial(epoch_results, engine), reference_results, seed=43, cases=500)
+
+def test_touching_intervals_are_merged(engine):
+    busy = [
+        (datetime(2026, 1, 1, 10), datetime(2026, 1, 1, 11)),
+        (datetime(2026, 1, 1, 11), datetime(2026, 1, 1, 12)),
+    ]
+
+    assert engine.merge_intervals(list(busy)) == [(datetime(2026, 1, 1, 10), datetime(2026, 1, 1, 12))]
+
+def test_empty_calendar_is_one_free_window(engine):
+    start_time, end_time = datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 18)
+
+    assert engine.free_intervals([], start_time, end_time) == [(start_time, end_time)]
+    assert len(engine.find_slots([], start_time, end_time, timedelta(hours=1))) == 10
+
+def test_non_positive_duration_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.generate_slots([(datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 9))], timedelta(0))
@@ -0,0 +1,84 @@
+import itertools
+from datetime import datetime, timedelta
+
+import intervals
+from quorum import find_quorum_slots
+
+START_TIME = datetime(2026, 1, 1, 8, 0)
+END_TIME = datetime(2026, 1, 1, 20, 0)
+STEP = timedelta(minutes=15)
+
+
+def random_members(rng, member_count):
+    steps = int((END_TIME - START_TIME) / STEP)
+    busy_by_user = {}
+
+    for user_id in range(member_count):
+        busy = []
+        for _ in range(rng.randint(0, 6)):
+            start = START_TIME + rng.randrange(steps) * STEP
+            busy.append((start, min(start + rng.randint(1, 12) * STEP, END_TIME)))
+        busy_by_user[f"user-{user_id}"] = busy
+
+    return busy_by_user
+
+def free_members(busy_by_user, start, end):
+    return {
+        user_id for user_id, busy in busy_by_user.items()
+        if not any(busy_start < end and busy_end > start for busy_start, busy_end in busy)
+    }
+
+def quorum_slots(busy_by_user, min_attendees, duration):
+    return find_quorum_slots(
+        busy_by_user, len(busy_by_user), START_TIME, END_TIME, duration, min_attendees, include_missing=True
+    )
+
+def everyone_free(busy_by_user, duration):
+    return [(start, end) for start, end, _, _ in quorum_slots(busy_by_user, len(busy_by_user), duration)]
+
+def common_free(busy_by_user, duration):
+    everyone = [interval for busy in busy_by_user.values() for interval in busy]
+    return intervals.find_slots(everyone, START_TIME, END_TIME, duration)
+
+def brute_force_attendance(busy_by_user, min_attendees, duration):
+    """Scan every STEP of the window: runs of steps where the quorum is free, cut into back-to-back slots from their start"""
+    step_starts = [START_TIME + index * STEP for index in range(int((END_TIME - START_TIME) / STEP))]
+
+    slots = []
+    for quorate, run in itertools.groupby(
+        step_starts, key=lambda start: len(free_members(busy_by_user, start, start + STEP)) >= min_attendees
+    ):
+        if not quorate:
+            continue
+
+        run = list(run)
+        start, run_end = run[0], run[-1] + STEP
+        while start + duration <= run_end:
+            free = free_members(busy_by_user, start, start + duration)
+            if len(free) >= min_attendees:
+                slots.append((start, start + duration, len(free), sorted(set(busy_by_user) - free)))
+            start += duration
+    return slots
+
+def test_everyone_required_matches_free_intervals(compare_randomized):
+    compare_randomized(
+        lambda rng: (random_members(rng, rng.randint(1, 6)), rng.choice([STEP, 4 * STEP])),
+        everyone_free,
+        common_free,
+        seed=7
+    )
+
+def test_slot_availability_matches_brute_force(compare_randomized):
+    compare_randomized(
+        lambda rng: (random_members(rng, 6), rng.randint(1, 6), rng.choice([STEP, 3 * STEP])),
+        quorum_slots,
+        brute_force_attendance,
+        seed=11
+    )
+
+def test_members_without_events_count_as_available():
+    busy_by_user = {"alice": [(datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 20))]}
+
+    slots = find_quorum_slots(busy_by_user, 3, START_TIME, END_TIME, timedelta(hours=4), 2)
+
+    assert [(start.hour, available) for start, _, available, _ in slots] == [(8, 2), (12, 2), (16, 2)]
@@ -0,0 +1,91 @@
+import itertools
+from datetime import datetime, time, timedelta
+
+from ranking import find_top_slots
+
+START_TIME = datetime(2026, 1, 1, 0, 0)
+END_TIME = datetime(2026, 1, 8, 0, 0)
+STEP = timedelta(minutes=15)
+HOUR = timedelta(hours=1)
+
+
+def random_busy(rng):
+    steps = int((END_TIME - START_TIME) / STEP)
+    busy = []
+    for _ in range(rng.randint(0, 80)):
+        start = START_TIME + rng.randrange(steps) * STEP
+        busy.append((start, min(start + rng.randint(1, 16) * STEP, END_TIME)))
+    return busy
+
+def random_case(rng):
+    return (
+        random_busy(rng),
+        rng.choice([STEP, 4 * STEP]),
+        rng.randint(1, 30),
+        rng.choice([None, [9, 17], [20, 24]]),
+        rng.choice([timedelta(0), STEP]),
+        rng.choice(["earliest", "least_fragmented"]),
+    )
+
+def top_slots(busy, duration, top_k, preferred_hours, padding, rank_by):
+    return find_top_slots(busy, START_TIME, END_TIME, duration, top_k, preferred_hours, padding, rank_by)
+
+def brute_force(busy, duration, top_k, preferred_hours, padding, rank_by):
+    """Mark every STEP of the window free or busy, buffer included, then sort every slot of every long enough free run"""
+    step_starts = [START_TIME + index * STEP for index in range(int((END_TIME - START_TIME) / STEP))]
+
+    def is_free(start):
+        return not any(busy_start - padding < start + STEP and busy_end + padding > start for busy_start, busy_end in busy)
+
+    windows = []
+    for free, run in itertools.groupby(step_starts, key=is_free):
+        run = list(run)
+        if free and run[-1] + STEP - run[0] >= duration:
+            windows.append((run[0], run[-1] + STEP))
+
+    def fragments(slot_start):
+        midnight = datetime.combine(slot_start.date(), time())
+        return sum(1 for start, end in windows if start < midnight + timedelta(days=1) and end > midnight)
+
+    def preferred(slot_start, slot_end):
+        if preferred_hours is None:
+            return True
+        midnight = datetime.combine(slot_start.date(), time())
+        return preferred_hours[0] <= (slot_start - midnight) / HOUR and (slot_end - midnight) / HOUR <= preferred_hours[1]
+
+    slots = []
+    for window_start, window_end in windows:
+        for index in range(int((window_end - window_start) / duration)):
+            slots.append((window_start + index * duration, window_start + (index + 1) * duration))
+
+    def score(slot):
+        return (not preferred(*slot), fragments(slot[0]) if rank_by == "least_fragmented" else 0, slot[0])
+
+    return sorted(slots, key=score)[:top_k]
+
+def test_top_slots_match_full_sort(compare_randomized):
+    compare_randomized(random_case, top_slots, brute_force, seed=3)
+
+def test_buffer_keeps_slots_away_from_events():
+    busy = [(datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 10))]
+
+    slots = find_top_slots(
+        busy, datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 12), timedelta(hours=1), 2, padding=timedelta(minutes=30)
+    )
+
+    assert slots == [
+        (datetime(2026, 1, 1, 10, 30), datetime(2026, 1, 1, 11, 30)),
+    ]
+
+def test_buffer_does_not_shrink_availability():
+    unavailable = [(datetime(2026, 1, 1, 0), datetime(2026, 1, 1, 9)), (datetime(2026, 1, 1, 17), datetime(2026, 1, 2, 0))]
+
+    slots = find_top_slots(
+        [], datetime(2026, 1, 1, 0), datetime(2026, 1, 2, 0), timedelta(hours=1), 2,
+        padding=timedelta(minutes=30), unavailable=unavailable
+    )
+
+    assert slots == [
+        (datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 10)),
+        (datetime(2026, 1, 1, 10), datetime(2026, 1, 1, 11)),
+    ]
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from recurrence import occurrences, overlaps, parse_rule, series_end
+
+START = datetime(2026, 1, 1)
+HORIZON = START + timedelta(days=400)
+
+
+def random_event(rng):
+    start_time = START + timedelta(hours=rng.randrange(24 * 20))
+    end_time = start_time + timedelta(minutes=rng.choice([30, 60, 120, 600]))
+    if rng.random() < 0.2:
+        return start_time, end_time, None
+
+    rule = f"FREQ={rng.choice(['DAILY', 'WEEKLY'])};INTERVAL={rng.randint(1, 4)}"
+    bound = rng.random()
+    if bound < 0.4:
+        rule += f";COUNT={rng.randint(1, 8)}"
+    elif bound < 0.7:
+        rule += ";UNTIL=" + (start_time + timedelta(days=rng.randint(0, 60))).strftime("%Y%m%dT%H%M%S")
+
+    return start_time, end_time, rule
+
+def expanded(event):
+    start_time, end_time, rule = event
+    if rule is None:
+        return [(start_time, end_time)]
+    return list(occurrences(start_time, end_time, rule, START, HORIZON))
+
+def brute_force_overlaps(first, second):
+    return any(
+        start_1 < end_2 and end_1 > start_2
+        for start_1, end_1 in expanded(first)
+        for start_2, end_2 in expanded(second)
+    )
+
+def test_overlaps_matches_enumeration(compare_randomized):
+    compare_randomized(
+        lambda rng: (random_event(rng), random_event(rng)),
+        overlaps,
+        brute_force_overlaps,
+        seed=1,
+        cases=300
+    )
+
+def test_occurrences_start_inside_the_window():
+    start_time = datetime(2020, 1, 6, 9)
+
+    spans = list(occurrences(start_time, start_time + timedelta(minutes=30), "FREQ=WEEKLY", START, START + timedelta(days=14)))
+
+    assert [span_start for span_start, _ in spans] == [datetime(2026, 1, 5, 9), datetime(2026, 1, 12, 9)]
+
+def test_series_end_respects_count_and_until():
+    start_time, end_time = datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 10)
+
+    assert series_end(start_time, end_time, "FREQ=DAILY;COUNT=3") == datetime(2026, 1, 3, 10)
+    assert series_end(start_time, end_time, "RRULE:FREQ=WEEKLY;INTERVAL=2;UNTIL=20260120T000000") == datetime(2026, 1, 15, 10)
+    assert series_end(start_time, end_time, "FREQ=DAILY") is None
+
+@pytest.mark.parametrize("rule", ["FREQ=MONTHLY", "FREQ=DAILY;BYDAY=MO", "FREQ=DAILY;COUNT=0", "FREQ=DAILY;COUNT=2;UNTIL=20260101T000000"])
+def test_unsupported_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        parse_rule(rule)
@@ -0,0 +1,36 @@
+import json
+
+from scheduling import BULK_QUEUE, INTERACTIVE_QUEUE, FairScheduler
+
+
+def push(scheduler, lane, name, group_id):
+    scheduler.push(lane, None, name, None, json.dumps({"group_id": group_id}))
+
+def drain(scheduler, limit=1):
+    order = []
+    while scheduler:
+        order.append([method for method, _, _ in scheduler.pop(limit)])
+    return order
+
+def test_groups_take_turns_inside_a_lane():
+    scheduler = FairScheduler()
+    for index in range(3):
+        push(scheduler, BULK_QUEUE, f"heavy-{index}", 1)
+    push(scheduler, BULK_QUEUE, "light", 2)
+
+    assert drain(scheduler) == [["heavy-0"], ["light"], ["heavy-1"], ["heavy-2"]]
+
+def test_interactive_lane_goes_first():
+    scheduler = FairScheduler()
+    push(scheduler, BULK_QUEUE, "bulk", 1)
+    push(scheduler, INTERACTIVE_QUEUE, "interactive", 1)
+
+    assert drain(scheduler) == [["interactive"], ["bulk"]]
+
+def test_batches_hold_a_single_group():
+    scheduler = FairScheduler()
+    for index in range(3):
+        push(scheduler, BULK_QUEUE, f"a-{index}", 1)
+    push(scheduler, BULK_QUEUE, "b-0", 2)
+
+    assert drain(scheduler, limit=2) == [["a-0", "a-1"], ["b-0"], ["a-2"]]
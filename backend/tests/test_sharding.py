@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import common
+import intervals
+
+START_TIME = datetime(2026, 1, 1, 0, 0)
+END_TIME = datetime(2026, 1, 8, 0, 0)
+
+
+def shard_windows(shard_length):
+    windows = []
+    shard_start = START_TIME
+    while shard_start < END_TIME:
+        windows.append((shard_start, min(shard_start + shard_length, END_TIME)))
+        shard_start += shard_length
+    return windows
+
+def map_shards(busy, shard_length):
+    """The free intervals every shard stores, in the start order the reduce query reads them"""
+    free = []
+    for shard_start, shard_end in shard_windows(shard_length):
+        free += intervals.find_free(common.clip_intervals(busy, shard_start, shard_end), shard_start, shard_end)
+    return sorted(free)
+
+def random_case(rng):
+    busy = []
+    for _ in range(rng.randint(0, 30)):
+        start = START_TIME + timedelta(minutes=rng.randrange(7 * 24 * 4) * 15)
+        busy.append((start, min(start + timedelta(minutes=rng.randint(1, 48) * 15), END_TIME)))
+    return busy, timedelta(hours=rng.choice([6, 12, 24, 36])), timedelta(minutes=rng.choice([15, 60, 240, 1440]))
+
+def sharded(busy, shard_length, duration):
+    return common.shard_result(map_shards(busy, shard_length), duration)
+
+@pytest.fixture(params=["windows", "slots"])
+def result_format(request, monkeypatch):
+    monkeypatch.setattr(common, "RESULT_FORMAT", request.param)
+    return request.param
+
+def unsharded(result_format):
+    find = intervals.find_windows if result_format == "windows" else intervals.find_slots
+    return lambda busy, shard_length, duration: (find(list(busy), START_TIME, END_TIME, duration), result_format)
+
+def test_sharded_result_matches_unsharded(result_format, compare_randomized):
+    compare_randomized(random_case, sharded, unsharded(result_format), seed=17)
+
+def test_free_interval_spanning_a_shard_boundary(result_format):
+    # free from 20:00 on the first day to 04:00 on the second, across the midnight boundary
+    busy = [(START_TIME, START_TIME + timedelta(hours=20)), (START_TIME + timedelta(hours=28), END_TIME)]
+
+    result = sharded(busy, timedelta(days=1), timedelta(hours=3))
+
+    assert result == unsharded(result_format)(busy, None, timedelta(hours=3))
+    assert any(start < START_TIME + timedelta(days=1) < end for start, end in result[0])
+
+def test_duration_longer_than_one_shards_free_tail(result_format):
+    # each shard alone has one free hour at its edge, together they fit a two hour slot
+    busy = [(START_TIME, START_TIME + timedelta(hours=23)), (START_TIME + timedelta(hours=25), END_TIME)]
+
+    result = sharded(busy, timedelta(days=1), timedelta(hours=2))
+
+    assert result == unsharded(result_format)(busy, None, timedelta(hours=2))
+    assert result[0] == [(START_TIME + timedelta(hours=23), START_TIME + timedelta(hours=25))]
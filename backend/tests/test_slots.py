@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from app.utils.slots import expand_slots
+
+START_TIME = datetime(2026, 1, 1, 8, 0)
+STEP = timedelta(minutes=15)
+
+
+def random_windows(rng):
+    windows = []
+    window_end = START_TIME
+    for _ in range(rng.randint(0, 8)):
+        window_start = window_end + rng.randint(1, 8) * STEP
+        window_end = window_start + rng.randint(1, 16) * STEP
+        windows.append((window_start, window_end))
+    return windows
+
+def random_case(rng):
+    return random_windows(rng), rng.randint(1, 4) * STEP, rng.randint(1, 3) * STEP, rng.randint(1, 7)
+
+def all_slots(windows, duration, step):
+    """Every slot of every window, walked one step at a time"""
+    slots = []
+    for window_start, window_end in windows:
+        for index in range(int((window_end - window_start) / step) + 1):
+            if window_start + index * step + duration <= window_end:
+                slots.append((window_start + index * step, window_start + index * step + duration))
+    return slots
+
+def page(windows, duration, step, cursor, limit):
+    """One page the way get_window_slots reads it: only windows ending after the cursor are loaded"""
+    loaded = [(start, end) for start, end in windows if cursor is None or end > cursor]
+    return expand_slots(loaded, duration, step, cursor, limit)
+
+def paged_slots(windows, duration, step, limit):
+    slots, cursor = page(windows, duration, step, None, limit)
+    pages = [slots]
+    while cursor is not None:
+        slots, cursor = page(windows, duration, step, cursor, limit)
+        pages.append(slots)
+
+    # only the last page may be short, and no page after it is empty
+    assert all(len(slots) == limit for slots in pages[:-1])
+    assert pages[-1] or len(pages) == 1
+    return [slot for slots in pages for slot in slots]
+
+def test_pages_join_into_every_slot(compare_randomized):
+    compare_randomized(
+        random_case,
+        paged_slots,
+        lambda windows, duration, step, limit: all_slots(windows, duration, step),
+        seed=19,
+        cases=500
+    )
+
+def test_page_crossing_a_window_boundary():
+    windows = [(START_TIME, START_TIME + 3 * STEP), (START_TIME + 8 * STEP, START_TIME + 10 * STEP)]
+
+    slots, cursor = page(windows, STEP, STEP, None, 4)
+
+    assert slots == [
+        (START_TIME, START_TIME + STEP),
+        (START_TIME + STEP, START_TIME + 2 * STEP),
+        (START_TIME + 2 * STEP, START_TIME + 3 * STEP),
+        (START_TIME + 8 * STEP, START_TIME + 9 * STEP),
+    ]
+    assert cursor == START_TIME + 9 * STEP
+    assert page(windows, STEP, STEP, cursor, 4) == ([(START_TIME + 9 * STEP, START_TIME + 10 * STEP)], None)
+
+def test_last_page_ending_on_a_window_boundary():
+    windows = [(START_TIME, START_TIME + 2 * STEP), (START_TIME + 4 * STEP, START_TIME + 6 * STEP)]
+
+    first, cursor = page(windows, STEP, STEP, None, 2)
+    second, last_cursor = page(windows, STEP, STEP, cursor, 2)
+
+    assert cursor == START_TIME + 4 * STEP
+    assert first + second == all_slots(windows, STEP, STEP)
+    assert last_cursor is None
+
+def test_cursor_between_steps_starts_at_the_next_step():
+    windows = [(START_TIME, START_TIME + 8 * STEP)]
+
+    slots, _ = page(windows, 2 * STEP, STEP, START_TIME + timedelta(minutes=20), 1)
+
+    assert slots == [(START_TIME + 2 * STEP, START_TIME + 4 * STEP)]